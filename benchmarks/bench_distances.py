@@ -0,0 +1,64 @@
+"""
+Compare NumPy distance matrix with the per-pair geopy loop.
+
+Run from the project directory:
+
+    python benchmarks/bench_distances.py --orders 500 --restaurants 50
+"""
+import argparse
+import random
+
+from geopy.distance import great_circle
+
+from utils import setup_django, measure
+
+setup_django()
+
+from restaurateur.distances import get_distance_matrix  # noqa: E402
+
+
+def rank_with_geopy(orders_coordinates, restaurants_coordinates):
+    ranking = []
+    for order_coordinates in orders_coordinates:
+        distances = {
+            position: great_circle(order_coordinates, restaurant_coordinates).km
+            for position, restaurant_coordinates in enumerate(restaurants_coordinates)
+            }
+        ranking.append(dict(sorted(distances.items(), key=lambda x: x[1])))
+    return ranking
+
+
+def rank_with_numpy(orders_coordinates, restaurants_coordinates):
+    return get_distance_matrix(
+        orders_coordinates,
+        restaurants_coordinates,
+        ).argsort(axis=1)
+
+
+def get_random_coordinates(count):
+    return [
+        (random.uniform(59.8, 60.1), random.uniform(30.1, 30.5))
+        for _ in range(count)
+        ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--orders', type=int, default=500)
+    parser.add_argument('--restaurants', type=int, default=50)
+    args = parser.parse_args()
+
+    random.seed(1)
+    orders_coordinates = get_random_coordinates(args.orders)
+    restaurants_coordinates = get_random_coordinates(args.restaurants)
+
+    geopy_time = measure(rank_with_geopy, orders_coordinates, restaurants_coordinates)
+    numpy_time = measure(rank_with_numpy, orders_coordinates, restaurants_coordinates)
+    print(f'{args.orders} orders x {args.restaurants} restaurants')
+    print(f'geopy loop:   {geopy_time * 1000:.1f} ms')
+    print(f'numpy matrix: {numpy_time * 1000:.1f} ms')
+    print(f'speedup:      {geopy_time / numpy_time:.0f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Compare bitmask order matching with the per-pair product set check.
+
+Run from the project directory:
+
+    python benchmarks/bench_matching.py --orders 10000 --restaurants 500
+"""
+import argparse
+import random
+from types import SimpleNamespace
+
+from utils import setup_django, measure
+
+setup_django()
+
+from foodcartapp.availability import AvailabilityMatrix  # noqa: E402
+from foodcartapp.fulfillment import get_fulfilling_restaurants  # noqa: E402
+
+
+def match_with_sets(orders_products, restaurants, products_by_restaurant):
+    return [
+        [
+            restaurant for restaurant in restaurants
+            if order_products <= products_by_restaurant[restaurant.id]
+            ]
+        for order_products in orders_products
+        ]
+
+
+def match_with_masks(orders_products, matrix):
+    return [
+        get_fulfilling_restaurants(order_products, matrix)
+        for order_products in orders_products
+        ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--orders', type=int, default=10000)
+    parser.add_argument('--restaurants', type=int, default=500)
+    parser.add_argument('--products', type=int, default=100)
+    parser.add_argument('--stop-list-share', type=float, default=0.05)
+    args = parser.parse_args()
+
+    random.seed(1)
+    restaurants = [SimpleNamespace(id=restaurant_id) for restaurant_id in range(args.restaurants)]
+    products_by_restaurant = {
+        restaurant.id: {
+            product_id for product_id in range(args.products)
+            if random.random() > args.stop_list_share
+            }
+        for restaurant in restaurants
+        }
+    orders_products = [
+        set(random.sample(range(args.products), random.randint(1, 5)))
+        for _ in range(args.orders)
+        ]
+
+    masks = {}
+    for position, restaurant in enumerate(restaurants):
+        for product_id in products_by_restaurant[restaurant.id]:
+            masks[product_id] = masks.get(product_id, 0) | 1 << position
+    matrix = AvailabilityMatrix(restaurants, masks)
+
+    assert match_with_sets(orders_products, restaurants, products_by_restaurant) == \
+        match_with_masks(orders_products, matrix)
+
+    sets_time = measure(match_with_sets, orders_products, restaurants, products_by_restaurant,
+                        repeat=3)
+    masks_time = measure(match_with_masks, orders_products, matrix, repeat=3)
+    print(f'{args.orders} orders x {args.restaurants} restaurants')
+    print(f'set check:    {sets_time * 1000:.1f} ms')
+    print(f'bitmask AND:  {masks_time * 1000:.1f} ms')
+    print(f'speedup:      {sets_time / masks_time:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Compare order throughput of /api/order/ and /api/orders/batch/.
+
+Runs against a temporary test database. From the project directory:
+
+    python benchmarks/bench_order_ingestion.py --orders 500 --items 3
+"""
+import argparse
+import random
+
+from utils import setup_django, test_database, measure
+
+setup_django()
+
+from django.urls import reverse  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from rest_framework.test import APIRequestFactory, force_authenticate  # noqa: E402
+
+from foodcartapp.models import Product  # noqa: E402
+from foodcartapp.views import register_order, register_orders_batch  # noqa: E402
+
+
+def get_orders(products, orders_count, items_count):
+    return [
+        {
+            'products': [
+                {'product': product.id, 'quantity': random.randint(1, 5)}
+                for product in random.sample(products, items_count)
+                ],
+            'firstname': 'Vasya',
+            'lastname': 'Petrov',
+            'address': f'Дыбенко, {number}',
+            'phonenumber': '+79311234567',
+        }
+        for number in range(orders_count)
+        ]
+
+
+def post_one_by_one(orders):
+    factory = APIRequestFactory()
+    url = reverse('foodcartapp:register_order')
+    for order in orders:
+        response = register_order(factory.post(url, order, format='json'))
+        assert response.status_code == 200, response.data
+
+
+def post_batch(orders, partner):
+    factory = APIRequestFactory()
+    url = reverse('foodcartapp:register_orders_batch')
+    request = factory.post(url, orders, format='json')
+    force_authenticate(request, user=partner)
+    response = register_orders_batch(request)
+    assert not response.data['errors'], response.data['errors']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--orders', type=int, default=500)
+    parser.add_argument('--items', type=int, default=3)
+    args = parser.parse_args()
+
+    random.seed(1)
+    with test_database():
+        products = [
+            Product.objects.create(name=f'Бургер {number}', price=100 + number)
+            for number in range(max(args.items, 20))
+            ]
+        orders = get_orders(products, args.orders, args.items)
+        partner = User.objects.create_user('partner')
+
+        single_time = measure(post_one_by_one, orders, repeat=3)
+        batch_time = measure(post_batch, orders, partner, repeat=3)
+
+    print(f'{args.orders} orders x {args.items} items')
+    print(f'one by one: {args.orders / single_time:.0f} orders/s')
+    print(f'batch:      {args.orders / batch_time:.0f} orders/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+Compare query counts and timings of hot views saved by the query budget test.
+
+Save a baseline on each commit and compare them:
+
+    QUERY_BUDGET_BASELINE=/tmp/old.json python manage.py test restaurateur.test_query_budget
+    python benchmarks/compare_baselines.py /tmp/old.json /tmp/new.json --tolerance 1.5
+
+Exits with status 1 if a view makes more queries or gets slower than
+the tolerance allows.
+"""
+import argparse
+import json
+import sys
+
+
+def compare(old_baselines, new_baselines, tolerance):
+    regressions = []
+    for view in sorted(new_baselines):
+        new = new_baselines[view]
+        old = old_baselines.get(view)
+        if old is None:
+            print(f'{view:<28} new: {new["queries"]} queries, {new["seconds"] * 1000:.1f} ms')
+            continue
+
+        ratio = new['seconds'] / old['seconds'] if old['seconds'] else 1
+        print(f'{view:<28} queries {old["queries"]} -> {new["queries"]}, '
+              f'{old["seconds"] * 1000:.1f} -> {new["seconds"] * 1000:.1f} ms ({ratio:.2f}x)')
+        if new['queries'] > old['queries']:
+            regressions.append(f'{view}: more queries')
+        if ratio > tolerance:
+            regressions.append(f'{view}: {ratio:.2f}x slower')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('old')
+    parser.add_argument('new')
+    parser.add_argument('--tolerance', type=float, default=1.5,
+                        help='allowed slowdown ratio')
+    args = parser.parse_args()
+
+    with open(args.old) as old_file, open(args.new) as new_file:
+        regressions = compare(json.load(old_file), json.load(new_file), args.tolerance)
+
+    for regression in regressions:
+        print(f'REGRESSION {regression}')
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+import django
+
+
+def setup_django():
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'star_burger.settings')
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    """
+    Run the block against a fresh test database, like the test runner does.
+    """
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def measure(function, *args, repeat=5):
+    """
+    Return the best wall time of several runs in seconds.
+    """
+    timings = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        function(*args)
+        timings.append(time.perf_counter() - started_at)
+    return min(timings)
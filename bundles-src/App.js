@@ -62,6 +62,15 @@ class App extends Component {
 
     let csrfToken = document.querySelector("[name=csrfmiddlewaretoken]").value;
 
+    // Retries of the same order reuse its key, so the server won't register it twice
+    let body = JSON.stringify(data);
+    if (!this.checkoutAttempt || this.checkoutAttempt.body !== body){
+      this.checkoutAttempt = {
+        body,
+        idempotencyKey: `${Date.now()}-${Math.random().toString(36).slice(2)}`,
+      };
+    }
+
     try {
       let response = await fetch(url, {
         method: 'post',
@@ -69,8 +78,9 @@ class App extends Component {
           'Accept': 'application/json',
           'Content-Type': 'application/json',
           'X-CSRFToken': csrfToken,
+          'Idempotency-Key': this.checkoutAttempt.idempotencyKey,
         },
-        body: JSON.stringify(data),
+        body,
       });
 
       if (!response.ok){
@@ -78,6 +88,7 @@ class App extends Component {
         return;
       }
       let responseData = await response.json();
+      this.checkoutAttempt = null;
 
       this.setState({
         cart: [],
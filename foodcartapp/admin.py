@@ -12,7 +12,10 @@ from .models import ProductCategory
 from .models import Restaurant
 from .models import RestaurantMenuItem
 from .models import Order, OrderProductItem
+from .models import ArchivedOrder, ArchivedOrderProductItem
 from .forms import OrderAdminForm
+from restaurateur.assignment import assign_restaurants
+from restaurateur.geocoding_jobs import enqueue_orders_geocoding
 
 
 class RestaurantMenuItemInline(admin.TabularInline):
@@ -122,7 +125,7 @@ class OrderAdmin(admin.ModelAdmin):
     list_display = ['customer_name',
                     'address',
                     'phonenumber',
-                    'amount',
+                    'total',
                     'created_at',
                     'called_at',
                     'delivered_at',
@@ -130,6 +133,13 @@ class OrderAdmin(admin.ModelAdmin):
                     ]
     inlines = [OrderItemsInline, ]
     form = OrderAdminForm
+    readonly_fields = ['geocoding_status', 'total', ]
+    actions = ['assign_nearest_restaurants', ]
+
+    @admin.action(description='Назначить ближайшие рестораны')
+    def assign_nearest_restaurants(self, request, queryset):
+        assigned_count = assign_restaurants(queryset)
+        self.message_user(request, f'Назначено ресторанов: {assigned_count}')
 
     def response_change(self, request, obj):
         default_response = super().response_change(request, obj)
@@ -149,11 +159,60 @@ class OrderAdmin(admin.ModelAdmin):
 
     def save_model(self, request, obj, form, change):
         if not change:
+            has_coordinates = None not in (obj.latitude, obj.longitude)
+            if has_coordinates:
+                obj.geocoding_status = 'done'
             super().save_model(request, obj, form, change)
-            
+            if not has_coordinates:
+                enqueue_orders_geocoding([obj])
+            return
+
         previous_address = Order.objects.get(id=obj.id).address
         current_address = obj.address
         if previous_address != current_address:
             obj.latitude = None
             obj.longitude = None
+            obj.geocoding_status = 'pending'
         super().save_model(request, obj, form, change)
+        if previous_address != current_address:
+            enqueue_orders_geocoding([obj])
+
+
+class ArchivedOrderItemsInline(admin.TabularInline):
+    model = ArchivedOrderProductItem
+    extra = 0
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ArchivedOrder)
+class ArchivedOrderAdmin(admin.ModelAdmin):
+    list_display = ['id',
+                    'customer_name',
+                    'address',
+                    'phonenumber',
+                    'total',
+                    'created_at',
+                    'delivered_at',
+                    'restaurant',
+                    ]
+    list_select_related = ['restaurant', ]
+    search_fields = ['phonenumber', ]
+    date_hierarchy = 'created_at'
+    inlines = [ArchivedOrderItemsInline, ]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,151 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import ArchivedOrderProductItem, Order, OrderProductItem, SalesRollup
+
+
+def get_rollup_key(status, restaurant_id, created_at):
+    """
+    Return (day, restaurant ID) an order is counted under, None if it is not.
+    """
+    if status != 'completed' or restaurant_id is None:
+        return None
+    return timezone.localdate(created_at), restaurant_id
+
+
+def get_order_rollup_key(order_id):
+    order = Order.objects.filter(id=order_id).values('status', 'restaurant_id', 'created_at').first()
+    return order and get_rollup_key(**order)
+
+
+def add_to_rollups(rollup_key, items, sign=1):
+    """
+    Add items sales to the rollups of a day and a restaurant.
+
+    Items are (product ID, quantity, product price) tuples, sign -1
+    subtracts them. Rows are incremented in place, so concurrent
+    updates do not overwrite each other.
+    """
+    day, restaurant_id = rollup_key
+    sales = defaultdict(lambda: [0, Decimal(0)])
+    for product_id, quantity, product_price in items:
+        sales[product_id][0] += sign * quantity
+        sales[product_id][1] += sign * quantity * product_price
+
+    for product_id, (quantity, revenue) in sales.items():
+        rollups = SalesRollup.objects.filter(day=day,
+                                             restaurant_id=restaurant_id,
+                                             product_id=product_id,
+                                             )
+        increments = {'quantity': F('quantity') + quantity, 'revenue': F('revenue') + revenue}
+        if rollups.update(**increments):
+            continue
+        try:
+            with transaction.atomic():
+                SalesRollup.objects.create(day=day,
+                                           restaurant_id=restaurant_id,
+                                           product_id=product_id,
+                                           quantity=quantity,
+                                           revenue=revenue,
+                                           )
+        except IntegrityError:
+            # Another transaction has just created the row
+            rollups.update(**increments)
+
+
+def get_sales_rows(order_items):
+    return (
+        order_items
+        .filter(order__status='completed', order__restaurant__isnull=False)
+        .annotate(day=TruncDate('order__created_at'))
+        .values('day', 'order__restaurant', 'product')
+        .order_by()
+        .annotate(quantity_sum=Sum('quantity'),
+                  revenue_sum=Sum(F('quantity') * F('product_price')),
+                  )
+        )
+
+
+@transaction.atomic
+def rebuild_sales_rollups(batch_size=1000) -> int:
+    """
+    Recalculate all rollups from current and archived orders.
+    """
+    sales = defaultdict(lambda: [0, Decimal(0)])
+    for order_items in (OrderProductItem.objects.all(), ArchivedOrderProductItem.objects.all()):
+        for row in get_sales_rows(order_items).iterator():
+            key = (row['day'], row['order__restaurant'], row['product'])
+            sales[key][0] += row['quantity_sum']
+            sales[key][1] += row['revenue_sum']
+
+    SalesRollup.objects.all().delete()
+    SalesRollup.objects.bulk_create(
+        [
+            SalesRollup(day=day,
+                        restaurant_id=restaurant_id,
+                        product_id=product_id,
+                        quantity=quantity,
+                        revenue=revenue,
+                        )
+            for (day, restaurant_id, product_id), (quantity, revenue) in sales.items()
+        ],
+        batch_size=batch_size,
+        )
+    return len(sales)
+
+
+def get_sales_report(date_from, date_to, restaurant=None):
+    """
+    Return revenue by day and restaurant and top products for the period.
+
+    Reads only the rollups, never the orders.
+    """
+    rollups = SalesRollup.objects.filter(day__gte=date_from, day__lte=date_to)
+    if restaurant:
+        rollups = rollups.filter(restaurant=restaurant)
+
+    days = (
+        rollups
+        .values('day', 'restaurant', 'restaurant__name')
+        .order_by('day', 'restaurant__name')
+        .annotate(quantity=Sum('quantity'), revenue=Sum('revenue'))
+        )
+    products = (
+        rollups
+        .values('product', 'product__name')
+        .annotate(quantity=Sum('quantity'), revenue=Sum('revenue'))
+        .order_by('-revenue')
+        )
+    totals = rollups.aggregate(quantity=Sum('quantity'), revenue=Sum('revenue'))
+    return {
+        'date_from': date_from,
+        'date_to': date_to,
+        'quantity': totals['quantity'] or 0,
+        'revenue': totals['revenue'] or Decimal(0),
+        'days': [
+            {
+                'day': row['day'],
+                'restaurant': {
+                    'id': row['restaurant'],
+                    'name': row['restaurant__name'],
+                },
+                'quantity': row['quantity'],
+                'revenue': row['revenue'],
+            }
+            for row in days
+        ],
+        'products': [
+            {
+                'id': row['product'],
+                'name': row['product__name'],
+                'quantity': row['quantity'],
+                'revenue': row['revenue'],
+            }
+            for row in products
+        ],
+    }
@@ -0,0 +1,80 @@
+import contextvars
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ArchivedOrder, ArchivedOrderProductItem, Order, OrderProductItem
+
+
+ARCHIVED_ORDER_FIELDS = [
+    'id',
+    'firstname',
+    'lastname',
+    'phonenumber',
+    'address',
+    'created_at',
+    'updated_at',
+    'called_at',
+    'delivered_at',
+    'status',
+    'payment_method',
+    'comment',
+    'restaurant_id',
+    'latitude',
+    'longitude',
+    'total',
+]
+
+ARCHIVED_ITEM_FIELDS = ['id', 'order_id', 'product_id', 'product_price', 'quantity']
+
+# Set while archived orders are deleted: their totals need no refresh
+# and their sales stay in the rollups
+archiving_orders = contextvars.ContextVar('archiving_orders', default=False)
+
+
+def get_archivable_orders(horizon_days=None):
+    horizon_days = settings.ORDER_ARCHIVE_HORIZON_DAYS if horizon_days is None else horizon_days
+    return Order.objects.filter(
+        status='completed',
+        created_at__lt=timezone.now() - timedelta(days=horizon_days),
+        )
+
+
+def archive_orders_batch(orders, batch_size) -> int:
+    """
+    Move one batch of orders with their items into the archive tables.
+
+    The batch is copied and deleted in one transaction, so an interrupted
+    run loses nothing and the next run just picks the remaining orders.
+    An order already present in the archive raises IntegrityError and
+    rolls the whole batch back. Returns the number of archived orders.
+    """
+    with transaction.atomic():
+        order_rows = list(
+            orders
+            .order_by('id')
+            .select_for_update(skip_locked=True)
+            .values(*ARCHIVED_ORDER_FIELDS)[:batch_size]
+            )
+        if not order_rows:
+            return 0
+        order_ids = [order_row['id'] for order_row in order_rows]
+
+        ArchivedOrder.objects.bulk_create(
+            [ArchivedOrder(**order_row) for order_row in order_rows],
+            )
+        ArchivedOrderProductItem.objects.bulk_create(
+            [ArchivedOrderProductItem(**item_row)
+             for item_row in OrderProductItem.objects.filter(
+                 order__in=order_ids,
+                 ).values(*ARCHIVED_ITEM_FIELDS)],
+            )
+
+        token = archiving_orders.set(True)
+        try:
+            Order.objects.filter(id__in=order_ids).delete()
+        finally:
+            archiving_orders.reset(token)
+    return len(order_ids)
@@ -0,0 +1,125 @@
+import itertools
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Restaurant, RestaurantMenuItem
+
+
+AVAILABILITY_VERSION_KEY = 'availability:version'
+
+BITS_TABLE = bytes.maketrans(b'01', b'\x00\x01')
+
+_matrix = None
+
+
+class AvailabilityMatrix:
+    """
+    Product availability over restaurants ordered by name.
+
+    Each product is mapped to an integer bitmask where bit N is set
+    when the product is available in the N-th restaurant. Products
+    without available menu items are not stored, their mask is 0.
+    """
+
+    def __init__(self, restaurants, masks, version=None):
+        self.restaurants = restaurants
+        self.positions = {restaurant.id: position for position, restaurant in enumerate(restaurants)}
+        self.masks = masks
+        self.version = version
+        # Wall clock time, the matrix may be built by another process
+        self.built_at = time.time()
+
+    def is_expired(self):
+        return time.time() - self.built_at > settings.CATALOG_CACHE_TTL
+
+    @classmethod
+    def build(cls, version=None):
+        restaurants = list(Restaurant.objects.order_by('name'))
+        positions = {restaurant.id: position for position, restaurant in enumerate(restaurants)}
+
+        # Restaurants added after the first query wait for the next build
+        masks = {}
+        menu_items = RestaurantMenuItem.objects.filter(
+            availability=True,
+            restaurant__in=positions,
+            ).values_list('product_id', 'restaurant_id')
+        for product_id, restaurant_id in menu_items:
+            masks[product_id] = masks.get(product_id, 0) | 1 << positions[restaurant_id]
+        return cls(restaurants, masks, version)
+
+    def get_mask(self, product_id):
+        return self.masks.get(product_id, 0)
+
+    def get_row(self, product_id):
+        mask = self.get_mask(product_id)
+        return [bool(mask >> position & 1) for position in range(len(self.restaurants))]
+
+    def get_fulfillment_mask(self, product_ids):
+        """
+        Return the mask of restaurants having every product available.
+        """
+        mask = (1 << len(self.restaurants)) - 1
+        for product_id in product_ids:
+            mask &= self.get_mask(product_id)
+            if not mask:
+                break
+        return mask
+
+    def get_restaurants(self, mask):
+        # Bits are unpacked through a binary string, which is much faster
+        # than shifting the mask bit by bit for hundreds of restaurants.
+        bits = format(mask, 'b')[::-1].encode().translate(BITS_TABLE)
+        return list(itertools.compress(self.restaurants, bits))
+
+
+def get_availability_version():
+    # Versions start from a timestamp, so a flushed cache never repeats
+    # the version of a matrix memoized by some process.
+    cache.add(AVAILABILITY_VERSION_KEY, time.time_ns(), timeout=None)
+    return cache.get(AVAILABILITY_VERSION_KEY)
+
+
+def bump_availability_version():
+    """
+    Invalidate the availability matrix after menu or restaurant changes.
+
+    The version is bumped once more after commit, since other processes
+    may rebuild the matrix from the old data before the change commits.
+    """
+    _incr_availability_version()
+    transaction.on_commit(_incr_availability_version)
+
+
+def _incr_availability_version():
+    try:
+        cache.incr(AVAILABILITY_VERSION_KEY)
+    except ValueError:
+        cache.set(AVAILABILITY_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def get_availability_matrix():
+    """
+    Return the availability matrix of the current menu version.
+
+    The matrix is kept in the process memory and in the shared cache,
+    so only the first request after a menu change reads the database.
+    Either copy is rebuilt after CATALOG_CACHE_TTL seconds to catch up
+    with changes when the cache, and so the version, is not shared
+    between processes.
+    """
+    global _matrix
+
+    version = get_availability_version()
+    if _matrix is not None and _matrix.version == version and not _matrix.is_expired():
+        return _matrix
+
+    cache_key = f'availability:{version}'
+    matrix = cache.get(cache_key)
+    if matrix is None or matrix.is_expired():
+        matrix = AvailabilityMatrix.build(version)
+        cache.set(cache_key, matrix, timeout=settings.CATALOG_CACHE_TTL)
+    _matrix = matrix
+    return matrix
@@ -0,0 +1,87 @@
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+from .models import Product
+
+
+CATALOG_VERSION_KEY = 'catalog:version'
+
+
+def get_catalog_version():
+    # Versions start from a timestamp, so a flushed or evicted version
+    # never points to a stale catalog still cached under it.
+    cache.add(CATALOG_VERSION_KEY, time.time_ns(), timeout=None)
+    return cache.get(CATALOG_VERSION_KEY)
+
+
+def bump_catalog_version():
+    """
+    Invalidate the cached catalog after menu changes.
+
+    The version is bumped once more after commit, since other requests
+    may cache the catalog from the old data before the change commits.
+    """
+    _incr_catalog_version()
+    transaction.on_commit(_incr_catalog_version)
+
+
+def _incr_catalog_version():
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        cache.set(CATALOG_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def serialize_product(product):
+    category = None
+    if product.category:
+        category = {
+            'id': product.category.id,
+            'name': product.category.name,
+        }
+    return {
+        'id': product.id,
+        'name': product.name,
+        'price': product.price,
+        'special_status': product.special_status,
+        'description': product.description,
+        'category': category,
+        'image': product.image.url,
+        'restaurant': {
+            'id': product.id,
+            'name': product.name,
+        }
+    }
+
+
+def dump_catalog() -> bytes:
+    products = Product.objects.select_related('category').available()
+    return json.dumps(
+        [serialize_product(product) for product in products],
+        cls=DjangoJSONEncoder,
+        ensure_ascii=False,
+        separators=(',', ':'),
+        ).encode()
+
+
+def get_catalog():
+    """
+    Return (etag, JSON bytes) of available products.
+
+    Serialized catalog is cached until the next menu change, see
+    bump_catalog_version(), or for CATALOG_CACHE_TTL seconds.
+    """
+    cache_key = f'catalog:{get_catalog_version()}'
+    catalog = cache.get(cache_key)
+    if catalog is None:
+        content = dump_catalog()
+        etag = f'"{hashlib.md5(content).hexdigest()}"'
+        catalog = (etag, content)
+        cache.set(cache_key, catalog, timeout=settings.CATALOG_CACHE_TTL)
+    return catalog
@@ -0,0 +1,53 @@
+from collections import defaultdict
+
+from phonenumber_field.phonenumber import to_python
+
+from .models import Order, OrderProductItem
+from .streaming import iter_by_keyset
+
+
+ORDER_EXPORT_FIELDS = [
+    'id',
+    'created_at',
+    'status',
+    'payment_method',
+    'firstname',
+    'lastname',
+    'phonenumber',
+    'address',
+    'comment',
+    'restaurant_id',
+    'latitude',
+    'longitude',
+]
+
+
+def format_phonenumber(phonenumber):
+    """
+    Return the number in E.164, or as stored if it is not a valid one.
+    """
+    parsed_phonenumber = to_python(phonenumber)
+    if parsed_phonenumber and parsed_phonenumber.is_valid():
+        return parsed_phonenumber.as_e164
+    return phonenumber
+
+
+def iter_orders_export(chunk_size):
+    """
+    Yield orders with their items as dicts, chunk by chunk.
+
+    Each chunk costs two queries: orders and their items.
+    """
+    orders = Order.objects.values(*ORDER_EXPORT_FIELDS)
+    for orders_chunk in iter_by_keyset(orders, chunk_size):
+        items_by_order = defaultdict(list)
+        order_items = OrderProductItem.objects.filter(
+            order__in=[order['id'] for order in orders_chunk],
+            ).order_by('id').values('order_id', 'product_id', 'product_price', 'quantity')
+        for item in order_items:
+            items_by_order[item.pop('order_id')].append(item)
+
+        for order in orders_chunk:
+            order['phonenumber'] = format_phonenumber(order['phonenumber'])
+            order['items'] = items_by_order[order['id']]
+            yield order
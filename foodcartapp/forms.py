@@ -1,15 +1,41 @@
 from django import forms
-from .models import Order
-from .querysets import get_restaurants_with_order_products
+from django.db.models import Case, When
+
+from restaurateur.distances import rank_restaurants
+from .models import Order, Restaurant
+from .querysets import get_restaurants_for_orders
 
 
 class OrderAdminForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         order = self.instance
-        self.fields[
-            'restaurant'
-            ].queryset = get_restaurants_with_order_products(order.id)
+        restaurants = get_restaurants_for_orders([order.id])[order.id]
+        distances = rank_restaurants([order], {order.id: restaurants})[order.id]
+
+        restaurant_ids = [restaurant.id for restaurant in distances]
+        restaurant_ids += [
+            restaurant.id for restaurant in restaurants
+            if restaurant not in distances
+            ]
+        restaurant_field = self.fields['restaurant']
+        restaurant_field.queryset = Restaurant.objects.none()
+        if restaurant_ids:
+            restaurant_field.queryset = Restaurant.objects.filter(
+                id__in=restaurant_ids,
+                ).order_by(
+                    Case(*[
+                        When(id=restaurant_id, then=position)
+                        for position, restaurant_id in enumerate(restaurant_ids)
+                        ])
+                )
+        distances = {
+            restaurant.id: distance for restaurant, distance in distances.items()
+            }
+        restaurant_field.label_from_instance = lambda restaurant: (
+            f'{restaurant.name}, {distances[restaurant.id]:.2f} км'
+            if restaurant.id in distances else restaurant.name
+            )
 
     class Meta:
         model = Order
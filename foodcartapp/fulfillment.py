@@ -0,0 +1,21 @@
+from .availability import get_availability_matrix
+
+
+def get_fulfilling_restaurants(product_ids, matrix=None) -> list:
+    """
+    Return restaurants able to cook every product, ordered by name.
+
+    A restaurant is eligible only if it has an available menu item
+    for every product, a missing menu item counts as "not available".
+    Reads the cached availability matrix, see get_availability_matrix().
+    """
+    matrix = matrix or get_availability_matrix()
+    return matrix.get_restaurants(matrix.get_fulfillment_mask(product_ids))
+
+
+def can_fulfil(restaurant, product_ids, matrix=None) -> bool:
+    matrix = matrix or get_availability_matrix()
+    position = matrix.positions.get(restaurant.id)
+    if position is None:
+        return False
+    return bool(matrix.get_fulfillment_mask(product_ids) >> position & 1)
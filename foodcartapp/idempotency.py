@@ -0,0 +1,105 @@
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import IdempotencyKey
+
+
+IDEMPOTENCY_KEY_HEADER = 'Idempotency-Key'
+
+
+def get_request_fingerprint(request):
+    dumped_data = json.dumps(request.data, cls=DjangoJSONEncoder, sort_keys=True)
+    return hashlib.sha256(dumped_data.encode()).hexdigest()
+
+
+def get_idempotency_scope(request):
+    """
+    Return the endpoint and, when authenticated, the client of the request.
+    """
+    scope = request.path
+    if request.user.is_authenticated:
+        scope = f'{scope} user:{request.user.pk}'
+    return scope[:IdempotencyKey._meta.get_field('scope').max_length]
+
+
+def replay_stored_response(scope, key, request_fingerprint):
+    stored_key = IdempotencyKey.objects.filter(
+        scope=scope,
+        key=key,
+        expires_at__gt=timezone.now(),
+        ).first()
+    if stored_key is None:
+        return None
+    if stored_key.request_fingerprint != request_fingerprint:
+        return Response(
+            {'detail': f'{IDEMPOTENCY_KEY_HEADER} уже использован с другим запросом.'},
+            status=422,
+            )
+    return Response(
+        stored_key.response,
+        status=stored_key.status_code,
+        headers={'Idempotent-Replayed': 'true'},
+        )
+
+
+def idempotent(view):
+    """
+    Replay stored successful response for a repeated Idempotency-Key.
+
+    Keys are scoped by the endpoint and the authenticated client, so
+    the same key sent elsewhere or by someone else is a new request.
+
+    Successful responses are saved in the same transaction as the changes
+    made by the view, so a retry racing with the original request either
+    sees its response or fails on the unique key and replays it then.
+    Requests without the header are processed as usual.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_KEY_HEADER)
+        if not key:
+            return view(request, *args, **kwargs)
+        if len(key) > IdempotencyKey._meta.get_field('key').max_length:
+            raise ValidationError({IDEMPOTENCY_KEY_HEADER: ['Слишком длинный ключ.']})
+
+        scope = get_idempotency_scope(request)
+        request_fingerprint = get_request_fingerprint(request)
+        stored_response = replay_stored_response(scope, key, request_fingerprint)
+        if stored_response:
+            return stored_response
+
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                IdempotencyKey.objects.filter(
+                    scope=scope,
+                    key=key,
+                    expires_at__lte=now,
+                    ).delete()
+                response = view(request, *args, **kwargs)
+                if response.status_code < 300:
+                    IdempotencyKey.objects.create(
+                        scope=scope,
+                        key=key,
+                        request_fingerprint=request_fingerprint,
+                        status_code=response.status_code,
+                        response=response.data,
+                        expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+                        )
+        except IntegrityError:
+            stored_response = replay_stored_response(scope, key, request_fingerprint)
+            if stored_response is None:
+                raise
+            return stored_response
+        return response
+    return wrapper
@@ -0,0 +1,132 @@
+import random
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+
+import numpy as np
+import requests
+
+
+class LoadTestStats:
+    """
+    Thread-safe latencies and errors of requests grouped by endpoint.
+    """
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def record(self, endpoint, latency, failed):
+        with self.lock:
+            self.latencies[endpoint].append(latency)
+            if failed:
+                self.errors[endpoint] += 1
+
+    def get_report(self, duration):
+        report = {}
+        for endpoint, latencies in sorted(self.latencies.items()):
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+            report[endpoint] = {
+                'requests': len(latencies),
+                'errors': self.errors[endpoint],
+                'error_rate': round(self.errors[endpoint] / len(latencies), 4),
+                'throughput': round(len(latencies) / duration, 2),
+                'p50_ms': round(p50, 1),
+                'p95_ms': round(p95, 1),
+                'p99_ms': round(p99, 1),
+            }
+        return report
+
+
+class ShopperSession:
+    """
+    Replay what the shop frontend does: load the catalog and banners,
+    then maybe check out a random cart.
+    """
+    def __init__(self, base_url, stats, rng, cart_size=(1, 5), order_share=0.3, timeout=10):
+        self.base_url = base_url
+        self.stats = stats
+        self.rng = rng
+        self.cart_size = cart_size
+        self.order_share = order_share
+        self.timeout = timeout
+        self.http = requests.Session()
+
+    def request(self, method, path, **kwargs):
+        endpoint = f'{method} {path}'
+        started_at = time.perf_counter()
+        try:
+            response = self.http.request(method, urljoin(self.base_url, path),
+                                         timeout=self.timeout,
+                                         **kwargs)
+        except requests.RequestException:
+            self.stats.record(endpoint, time.perf_counter() - started_at, failed=True)
+            return None
+        self.stats.record(endpoint, time.perf_counter() - started_at, failed=not response.ok)
+        return response if response.ok else None
+
+    def run(self):
+        response = self.request('GET', '/api/products/')
+        self.request('GET', '/api/banners/')
+        if response is None or self.rng.random() >= self.order_share:
+            return False
+
+        products = response.json()
+        if not products:
+            return False
+        cart_size = min(self.rng.randint(*self.cart_size), len(products))
+        order = {
+            'products': [
+                {'product': product['id'], 'quantity': self.rng.randint(1, 3)}
+                for product in self.rng.sample(products, cart_size)
+            ],
+            'firstname': 'Нагрузка',
+            'lastname': 'Тестовая',
+            'phonenumber': '+79311234567',
+            'address': 'Санкт-Петербург, Дыбенко, 1',
+        }
+        response = self.request('POST', '/api/order/',
+                                json=order,
+                                headers={'Idempotency-Key': str(uuid.uuid4())},
+                                )
+        return response is not None
+
+
+def run_load_test(base_url, sessions=100, concurrency=10, cart_size=(1, 5),
+                  order_share=0.3, timeout=10, seed=None) -> dict:
+    """
+    Run shopper sessions against a live server and return a JSON-ready report.
+
+    Orders are really registered, so point it at a disposable database.
+    The report has throughput, p50/p95/p99 latency and error rate
+    for each endpoint, and the number of successful checkouts per second.
+    """
+    stats = LoadTestStats()
+    rng = random.Random(seed)
+    shopper_sessions = [
+        ShopperSession(base_url, stats,
+                       rng=random.Random(rng.random()),
+                       cart_size=cart_size,
+                       order_share=order_share,
+                       timeout=timeout,
+                       )
+        for _ in range(sessions)
+    ]
+
+    started_at = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        checkouts = sum(executor.map(ShopperSession.run, shopper_sessions))
+    duration = time.perf_counter() - started_at
+
+    return {
+        'base_url': base_url,
+        'sessions': sessions,
+        'concurrency': concurrency,
+        'duration': round(duration, 3),
+        'checkouts': checkouts,
+        'checkouts_per_second': round(checkouts / duration, 2),
+        'endpoints': stats.get_report(duration),
+    }
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from foodcartapp.archive import archive_orders_batch, get_archivable_orders
+
+
+class Command(BaseCommand):
+    help = 'Move completed orders older than the archive horizon into the archive tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--horizon-days',
+            type=int,
+            help='Archive orders created earlier than this many days ago, '
+                 'ORDER_ARCHIVE_HORIZON_DAYS by default',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of orders moved per transaction',
+        )
+        parser.add_argument(
+            '--max-batches',
+            type=int,
+            help='Stop after this many batches, the next run continues',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only count orders to archive',
+        )
+
+    def handle(self, *args, **options):
+        orders = get_archivable_orders(options['horizon_days'])
+        if options['dry_run']:
+            self.stdout.write(f'Orders to archive: {orders.count()}')
+            return
+
+        archived_count = batches_count = 0
+        while options['max_batches'] is None or batches_count < options['max_batches']:
+            try:
+                batch_count = archive_orders_batch(orders, options['batch_size'])
+            except IntegrityError as error:
+                raise CommandError(f'Batch {batches_count + 1} is already archived, '
+                                   f'orders are left in place: {error}')
+            if not batch_count:
+                break
+            archived_count += batch_count
+            batches_count += 1
+            self.stdout.write(f'Batch {batches_count}: {batch_count} orders')
+        self.stdout.write(f'Orders archived: {archived_count}')
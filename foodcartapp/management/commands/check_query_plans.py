@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from foodcartapp.models import Order, OrderProductItem, RestaurantMenuItem
+
+
+def get_hot_queries():
+    """
+    Return (description, queryset, expected index) of hot query shapes.
+    """
+    now = timezone.now()
+    return [
+        ('orders board',
+         Order.objects.exclude(status='completed').order_by('created_at', 'id')[:50],
+         'order_open_created_idx'),
+        ('orders board by payment method, next page',
+         Order.objects.exclude(status='completed').filter(
+             payment_method='cash',
+             created_at__gt=now,
+         ).order_by('created_at', 'id')[:50],
+         'order_open_created_idx'),
+        ('orders board by status',
+         Order.objects.filter(status='delivering').order_by('created_at', 'id')[:50],
+         'order_status_created_idx'),
+        ('orders stream',
+         Order.objects.filter(updated_at__gt=now).order_by('updated_at', 'id')[:50],
+         'order_updated_idx'),
+        ('orders of a product',
+         OrderProductItem.objects.filter(product=1).values('order'),
+         'item_product_order_idx'),
+        ('product availability',
+         RestaurantMenuItem.objects.filter(product=1, availability=True).values('id'),
+         'menuitem_product_avail_idx'),
+    ]
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN hot queries and check that they use the expected indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--allow-seqscan',
+            action='store_true',
+            help='Let PostgreSQL prefer sequential scans, as it does on small tables',
+        )
+
+    def handle(self, *args, **options):
+        missing_indexes = []
+        with transaction.atomic():
+            if connection.vendor == 'postgresql' and not options['allow_seqscan']:
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+
+            for description, queryset, index_name in get_hot_queries():
+                plan = queryset.explain()
+                used = index_name in plan
+                self.stdout.write(f'{description}: {"ok" if used else "MISSING"} {index_name}')
+                if options['verbosity'] > 1 or not used:
+                    self.stdout.write(plan)
+                if not used:
+                    missing_indexes.append(index_name)
+
+        if missing_indexes:
+            raise CommandError(f'Queries do not use indexes: {", ".join(missing_indexes)}')
@@ -0,0 +1,255 @@
+import os
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from PIL import Image, ImageDraw
+
+from foodcartapp.analytics import rebuild_sales_rollups
+from foodcartapp.availability import bump_availability_version
+from foodcartapp.catalog import bump_catalog_version
+from foodcartapp.models import Order, OrderProductItem
+from foodcartapp.models import Product, ProductCategory, Restaurant, RestaurantMenuItem
+from restaurateur.spatial import invalidate_restaurant_index
+
+
+PLACEHOLDER_IMAGE = 'generated/placeholder.png'
+
+CITY_CENTER = (59.94, 30.31)
+
+CUSTOMER_NAMES = ['Иван', 'Мария', 'Алексей', 'Ольга', 'Дмитрий', 'Анна', 'Сергей', 'Елена']
+CUSTOMER_SURNAMES = ['Иванов', 'Петрова', 'Смирнов', 'Кузнецова', 'Попов', 'Соколова']
+STREETS = ['Невский пр.', 'ул. Дыбенко', 'Лиговский пр.', 'ул. Марата', 'Московский пр.']
+
+
+@contextmanager
+def keep_order_dates():
+    """
+    Let bulk_create save generated created_at and updated_at as is.
+    """
+    created_at = Order._meta.get_field('created_at')
+    updated_at = Order._meta.get_field('updated_at')
+    try:
+        created_at.auto_now_add = updated_at.auto_now = False
+        yield
+    finally:
+        created_at.auto_now_add = updated_at.auto_now = True
+
+
+def get_next_id(model):
+    return (model.objects.aggregate(max_id=Max('id'))['max_id'] or 0) + 1
+
+
+def get_random_coordinates(rng, spread=0.1):
+    latitude, longitude = CITY_CENTER
+    return (round(rng.gauss(latitude, spread), 6),
+            round(rng.gauss(longitude, spread * 2), 6),
+            )
+
+
+class Command(BaseCommand):
+    help = 'Add a seeded synthetic dataset of restaurants, menus and order history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--restaurants', type=int, default=50)
+        parser.add_argument('--categories', type=int, default=8)
+        parser.add_argument('--products', type=int, default=300)
+        parser.add_argument('--orders', type=int, default=100000)
+        parser.add_argument(
+            '--months',
+            type=int,
+            default=6,
+            help='Length of the order history',
+        )
+        parser.add_argument(
+            '--menu-share',
+            type=float,
+            default=0.3,
+            help='Share of products on each restaurant menu',
+        )
+        parser.add_argument(
+            '--stop-list-share',
+            type=float,
+            default=0.1,
+            help='Share of menu items which are not available',
+        )
+        parser.add_argument('--max-cart', type=int, default=5)
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=10000,
+            help='Number of orders inserted per transaction',
+        )
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+
+        restaurants = self.create_restaurants(options['restaurants'])
+        products = self.create_products(options['categories'], options['products'])
+        menu_items_count = self.create_menu_items(restaurants,
+                                                  products,
+                                                  options['menu_share'],
+                                                  options['stop_list_share'],
+                                                  )
+        self.stdout.write(f'Restaurants: {len(restaurants)}, products: {len(products)}, '
+                          f'menu items: {menu_items_count}')
+
+        self.create_orders(options['orders'],
+                           restaurants,
+                           products,
+                           months=options['months'],
+                           max_cart=options['max_cart'],
+                           chunk_size=options['chunk_size'],
+                           )
+
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                    no_style(),
+                    [Restaurant, ProductCategory, Product, Order, OrderProductItem],
+                    ):
+                cursor.execute(sql)
+        invalidate_restaurant_index()
+        bump_availability_version()
+        bump_catalog_version()
+
+        # Orders are inserted in bulk, bypassing the signals keeping rollups
+        rollups_count = rebuild_sales_rollups()
+        self.stdout.write(f'Sales rollups: {rollups_count}')
+
+    def create_placeholder_image(self):
+        path = os.path.join(settings.MEDIA_ROOT, PLACEHOLDER_IMAGE)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            image = Image.new('RGB', (300, 300), '#f2c14e')
+            ImageDraw.Draw(image).ellipse((50, 90, 250, 210), fill='#8c4a1c')
+            image.save(path)
+        return PLACEHOLDER_IMAGE
+
+    def create_restaurants(self, count):
+        next_id = get_next_id(Restaurant)
+        restaurants = []
+        for restaurant_id in range(next_id, next_id + count):
+            latitude, longitude = get_random_coordinates(self.rng)
+            restaurants.append(Restaurant(id=restaurant_id,
+                                          name=f'Star Burger {restaurant_id}',
+                                          address=f'{self.rng.choice(STREETS)}, {restaurant_id}',
+                                          contact_phone=f'+7812{self.rng.randrange(10 ** 7):07}',
+                                          latitude=latitude,
+                                          longitude=longitude,
+                                          ))
+        return Restaurant.objects.bulk_create(restaurants)
+
+    def create_products(self, categories_count, count):
+        next_id = get_next_id(ProductCategory)
+        categories = ProductCategory.objects.bulk_create([
+            ProductCategory(id=category_id, name=f'Категория {category_id}')
+            for category_id in range(next_id, next_id + categories_count)
+        ])
+        image = self.create_placeholder_image()
+        next_id = get_next_id(Product)
+        return Product.objects.bulk_create([
+            Product(id=product_id,
+                    name=f'Блюдо {product_id}',
+                    category=self.rng.choice(categories),
+                    price=Decimal(self.rng.randrange(49, 999)),
+                    image=image,
+                    special_status=self.rng.random() < 0.05,
+                    )
+            for product_id in range(next_id, next_id + count)
+        ])
+
+    def create_menu_items(self, restaurants, products, menu_share, stop_list_share):
+        menu_size = max(1, round(len(products) * menu_share))
+        menu_items = [
+            RestaurantMenuItem(restaurant=restaurant,
+                               product=product,
+                               availability=self.rng.random() >= stop_list_share,
+                               )
+            for restaurant in restaurants
+            for product in self.rng.sample(products, min(menu_size, len(products)))
+        ]
+        RestaurantMenuItem.objects.bulk_create(menu_items, batch_size=10000)
+        return len(menu_items)
+
+    def create_orders(self, count, restaurants, products, months, max_cart, chunk_size):
+        """
+        Insert orders spread over the history with explicit IDs.
+
+        Popular products are ordered more often, orders older than
+        a day are completed.
+        """
+        now = timezone.now()
+        history = timedelta(days=30 * months)
+        product_weights = [1 / rank for rank in range(1, len(products) + 1)]
+        next_order_id = get_next_id(Order)
+        next_item_id = get_next_id(OrderProductItem)
+        created = 0
+
+        with keep_order_dates():
+            while created < count:
+                chunk_count = min(chunk_size, count - created)
+                orders = []
+                order_items = []
+                for order_id in range(next_order_id, next_order_id + chunk_count):
+                    # Newer orders get bigger IDs, like real ones
+                    created_at = now - history * (1 - (order_id - next_order_id + created) / count)
+                    cart = set(self.rng.choices(products,
+                                                weights=product_weights,
+                                                k=self.rng.randint(1, max_cart),
+                                                ))
+                    total = Decimal(0)
+                    for product in cart:
+                        quantity = self.rng.randint(1, 3)
+                        total += product.price * quantity
+                        order_items.append(OrderProductItem(id=next_item_id,
+                                                            order_id=order_id,
+                                                            product=product,
+                                                            product_price=product.price,
+                                                            quantity=quantity,
+                                                            ))
+                        next_item_id += 1
+                    orders.append(self.build_order(order_id, created_at, now, restaurants, total))
+
+                with transaction.atomic():
+                    Order.objects.bulk_create(orders, batch_size=chunk_size)
+                    OrderProductItem.objects.bulk_create(order_items, batch_size=chunk_size)
+                next_order_id += chunk_count
+                created += chunk_count
+                self.stdout.write(f'Orders: {created} of {count}')
+
+    def build_order(self, order_id, created_at, now, restaurants, total):
+        latitude, longitude = get_random_coordinates(self.rng)
+        order = Order(id=order_id,
+                      firstname=self.rng.choice(CUSTOMER_NAMES),
+                      lastname=self.rng.choice(CUSTOMER_SURNAMES),
+                      phonenumber=f'+7931{self.rng.randrange(10 ** 7):07}',
+                      address=f'{self.rng.choice(STREETS)}, {self.rng.randint(1, 200)}',
+                      created_at=created_at,
+                      updated_at=created_at,
+                      payment_method=self.rng.choice(Order.PAYMENT_METHOD)[0],
+                      latitude=latitude,
+                      longitude=longitude,
+                      geocoding_status='done',
+                      total=total,
+                      )
+        if now - created_at > timedelta(days=1):
+            order.status = 'completed'
+        else:
+            order.status = self.rng.choice(Order.STATUSES)[0]
+
+        if order.status != 'unprocessed':
+            order.restaurant = self.rng.choice(restaurants)
+            order.called_at = created_at + timedelta(minutes=self.rng.randint(1, 15))
+            order.updated_at = order.called_at
+        if order.status == 'completed':
+            order.delivered_at = order.called_at + timedelta(minutes=self.rng.randint(20, 90))
+            order.updated_at = order.delivered_at
+        return order
@@ -0,0 +1,46 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from foodcartapp.loadtest import run_load_test
+
+
+class Command(BaseCommand):
+    help = 'Replay shopper sessions against a running server and report latencies as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            default='http://127.0.0.1:8000/',
+            help='Server to load, orders are really registered there',
+        )
+        parser.add_argument('--sessions', type=int, default=100)
+        parser.add_argument('--concurrency', type=int, default=10)
+        parser.add_argument('--min-cart', type=int, default=1)
+        parser.add_argument('--max-cart', type=int, default=5)
+        parser.add_argument(
+            '--order-share',
+            type=float,
+            default=0.3,
+            help='Share of sessions ending with an order',
+        )
+        parser.add_argument('--timeout', type=float, default=10)
+        parser.add_argument('--seed', type=int)
+        parser.add_argument('--output', help='Write the report to a file instead of stdout')
+
+    def handle(self, *args, **options):
+        report = run_load_test(
+            options['url'],
+            sessions=options['sessions'],
+            concurrency=options['concurrency'],
+            cart_size=(options['min_cart'], options['max_cart']),
+            order_share=options['order_share'],
+            timeout=options['timeout'],
+            seed=options['seed'],
+        )
+        content = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                output_file.write(content)
+        else:
+            self.stdout.write(content)
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from foodcartapp.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = 'Delete expired idempotency keys'
+
+    def handle(self, *args, **options):
+        deleted_count, _ = IdempotencyKey.objects.filter(
+            expires_at__lte=timezone.now(),
+            ).delete()
+        self.stdout.write(f'Idempotency keys deleted: {deleted_count}')
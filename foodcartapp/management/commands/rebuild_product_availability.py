@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from foodcartapp.catalog import bump_catalog_version
+from foodcartapp.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Rebuild Product.is_available_anywhere from restaurant menus and report drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report products with a wrong flag',
+        )
+
+    def handle(self, *args, **options):
+        drifted_products = (
+            Product.objects
+            .with_actual_availability()
+            .exclude(is_available_anywhere=F('actual_availability'))
+            .values_list('id', 'name', 'actual_availability')
+            )
+        drifted_products = list(drifted_products)
+        for product_id, name, actual_availability in drifted_products:
+            self.stdout.write(
+                f'{product_id} {name}: is_available_anywhere should be {actual_availability}'
+                )
+        self.stdout.write(f'Products with drifted availability: {len(drifted_products)}')
+
+        if options['dry_run']:
+            return
+        Product.objects.refresh_availability()
+        bump_catalog_version()
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from foodcartapp.analytics import rebuild_sales_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recalculate sales rollups from current and archived completed orders'
+
+    def handle(self, *args, **options):
+        rollups_count = rebuild_sales_rollups()
+        self.stdout.write(f'Sales rollups rebuilt: {rollups_count}')
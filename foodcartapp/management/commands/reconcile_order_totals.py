@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from foodcartapp.models import Order
+
+
+class Command(BaseCommand):
+    help = 'Compare stored order totals with their items and fix drifted ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report orders with a wrong total',
+        )
+
+    def handle(self, *args, **options):
+        drifted_orders = list(
+            Order.objects
+            .with_live_total()
+            .exclude(total=F('live_total'))
+            .values_list('id', 'total', 'live_total')
+            )
+        for order_id, total, live_total in drifted_orders:
+            self.stdout.write(f'Order {order_id}: stored {total}, actual {live_total}')
+        self.stdout.write(f'Orders with drifted total: {len(drifted_orders)}')
+
+        if options['dry_run'] or not drifted_orders:
+            return
+        Order.objects.filter(
+            id__in=[order_id for order_id, _, _ in drifted_orders],
+            ).refresh_totals()
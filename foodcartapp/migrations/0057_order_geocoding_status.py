@@ -0,0 +1,26 @@
+# Generated by Django 3.2 on 2026-10-18 18:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    def mark_geocoded_orders(apps, schema_editor):
+        Order = apps.get_model('foodcartapp', 'Order')
+        Order.objects.filter(
+            latitude__isnull=False,
+            longitude__isnull=False,
+            ).update(geocoding_status='done')
+
+    dependencies = [
+        ('foodcartapp', '0056_alter_restaurant_address'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='geocoding_status',
+            field=models.CharField(choices=[('pending', 'ожидает геокодирования'), ('done', 'координаты определены'), ('not_found', 'адрес не найден'), ('failed', 'ошибка геокодирования')], default='pending', max_length=32, verbose_name='Статус геокодирования'),
+        ),
+        migrations.RunPython(mark_geocoded_orders, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 3.2 on 2026-10-18 18:32
+
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+
+
+class Migration(migrations.Migration):
+
+    def fill_availability(apps, schema_editor):
+        Product = apps.get_model('foodcartapp', 'Product')
+        RestaurantMenuItem = apps.get_model('foodcartapp', 'RestaurantMenuItem')
+
+        Product.objects.update(
+            is_available_anywhere=Exists(
+                RestaurantMenuItem.objects.filter(
+                    product=OuterRef('pk'),
+                    availability=True,
+                    )
+                )
+            )
+
+    dependencies = [
+        ('foodcartapp', '0057_order_geocoding_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='is_available_anywhere',
+            field=models.BooleanField(db_index=True, default=False, editable=False, verbose_name='в продаже хотя бы в одном ресторане'),
+        ),
+        migrations.RunPython(fill_availability, migrations.RunPython.noop),
+    ]
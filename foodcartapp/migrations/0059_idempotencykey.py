@@ -0,0 +1,29 @@
+# Generated by Django 3.2 on 2026-10-18 18:35
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0058_product_is_available_anywhere'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255, unique=True, verbose_name='ключ идемпотентности')),
+                ('request_fingerprint', models.CharField(max_length=64, verbose_name='хеш запроса')),
+                ('status_code', models.PositiveSmallIntegerField(verbose_name='код ответа')),
+                ('response', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='ответ')),
+                ('expires_at', models.DateTimeField(db_index=True, verbose_name='действует до')),
+            ],
+            options={
+                'verbose_name': 'ключ идемпотентности',
+                'verbose_name_plural': 'ключи идемпотентности',
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 3.2 on 2026-10-18 18:36
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+class Migration(migrations.Migration):
+
+    def fill_order_total(apps, schema_editor):
+        Order = apps.get_model('foodcartapp', 'Order')
+        OrderProductItem = apps.get_model('foodcartapp', 'OrderProductItem')
+
+        items_totals = (
+            OrderProductItem.objects
+            .filter(order=OuterRef('pk'))
+            .order_by()
+            .values('order')
+            .annotate(total=Sum(F('product_price') * F('quantity')))
+            .values('total')
+            )
+        Order.objects.update(
+            total=Coalesce(
+                Subquery(items_totals, output_field=models.DecimalField()),
+                0,
+                )
+            )
+
+    dependencies = [
+        ('foodcartapp', '0059_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='total',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=0, editable=False, max_digits=10, verbose_name='Сумма заказа'),
+        ),
+        migrations.RunPython(fill_order_total, migrations.RunPython.noop),
+    ]
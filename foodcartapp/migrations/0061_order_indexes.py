@@ -0,0 +1,61 @@
+# Generated by Django 3.2 on 2026-10-18 18:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0060_order_total'),
+    ]
+
+    # Composite indexes are created before the single column ones they
+    # replace are dropped
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='order_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(_negated=True, status='completed'), fields=['created_at', 'id'], name='order_open_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['updated_at', 'id'], name='order_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderproductitem',
+            index=models.Index(fields=['product', 'order'], name='item_product_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='restaurantmenuitem',
+            index=models.Index(fields=['product', 'availability'], name='menuitem_product_avail_idx'),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='payment_method',
+            field=models.CharField(choices=[('cash', 'наличный'), ('cashless', 'безналичный'), ('credit', 'кредит')], max_length=32, verbose_name='Способ оплаты'),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='status',
+            field=models.CharField(choices=[('unprocessed', 'необработанный'), ('delivering', 'доставляется'), ('completed', 'выполнен')], default='unprocessed', max_length=32, verbose_name='Статус'),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Время редактирования'),
+        ),
+        migrations.AlterField(
+            model_name='orderproductitem',
+            name='product',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='items', to='foodcartapp.product', verbose_name='продукт'),
+        ),
+        migrations.AlterField(
+            model_name='restaurantmenuitem',
+            name='product',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='menu_items', to='foodcartapp.product', verbose_name='продукт'),
+        ),
+    ]
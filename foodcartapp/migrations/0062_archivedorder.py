@@ -0,0 +1,55 @@
+# Generated by Django 3.2 on 2026-10-18 18:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+import phonenumber_field.modelfields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0061_order_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedOrder',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False, verbose_name='ID заказа')),
+                ('firstname', models.CharField(max_length=32, verbose_name='Имя заказчика')),
+                ('lastname', models.CharField(max_length=32, verbose_name='Фамилия заказчика')),
+                ('phonenumber', phonenumber_field.modelfields.PhoneNumberField(db_index=True, max_length=128, region=None, verbose_name='Телефон заказчика')),
+                ('address', models.CharField(max_length=255, verbose_name='Адрес доставки')),
+                ('created_at', models.DateTimeField(db_index=True, verbose_name='Время создания')),
+                ('updated_at', models.DateTimeField(verbose_name='Время редактирования')),
+                ('called_at', models.DateTimeField(blank=True, null=True, verbose_name='Дата и время звонка клиенту')),
+                ('delivered_at', models.DateTimeField(blank=True, null=True, verbose_name='Дата и время доставки клиенту')),
+                ('status', models.CharField(choices=[('unprocessed', 'необработанный'), ('delivering', 'доставляется'), ('completed', 'выполнен')], max_length=32, verbose_name='Статус')),
+                ('payment_method', models.CharField(choices=[('cash', 'наличный'), ('cashless', 'безналичный'), ('credit', 'кредит')], max_length=32, verbose_name='Способ оплаты')),
+                ('comment', models.TextField(blank=True, verbose_name='Комментарий')),
+                ('latitude', models.FloatField(blank=True, null=True, verbose_name='Широта')),
+                ('longitude', models.FloatField(blank=True, null=True, verbose_name='Долгота')),
+                ('total', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Сумма заказа')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Время архивации')),
+                ('restaurant', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_orders', to='foodcartapp.restaurant', verbose_name='Ресторан')),
+            ],
+            options={
+                'verbose_name': 'архивный заказ',
+                'verbose_name_plural': 'архивные заказы',
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedOrderProductItem',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False, verbose_name='ID позиции')),
+                ('product_price', models.DecimalField(decimal_places=2, max_digits=8, verbose_name='цена')),
+                ('quantity', models.PositiveSmallIntegerField(verbose_name='количество')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='foodcartapp.archivedorder', verbose_name='заказ')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_items', to='foodcartapp.product', verbose_name='продукт')),
+            ],
+            options={
+                'verbose_name': 'позиция в архивном заказе',
+                'verbose_name_plural': 'позиции в архивном заказе',
+            },
+        ),
+    ]
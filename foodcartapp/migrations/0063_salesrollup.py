@@ -0,0 +1,30 @@
+# Generated by Django 3.2 on 2026-10-18 18:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0062_archivedorder'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='день')),
+                ('quantity', models.IntegerField(default=0, verbose_name='количество')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='выручка')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales_rollups', to='foodcartapp.product', verbose_name='продукт')),
+                ('restaurant', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sales_rollups', to='foodcartapp.restaurant', verbose_name='ресторан')),
+            ],
+            options={
+                'verbose_name': 'продажи за день',
+                'verbose_name_plural': 'продажи по дням',
+                'unique_together': {('day', 'restaurant', 'product')},
+            },
+        ),
+    ]
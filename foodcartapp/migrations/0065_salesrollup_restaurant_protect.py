@@ -0,0 +1,24 @@
+# Rollups without a restaurant are dropped: such orders are not counted anymore
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    def delete_rollups_without_restaurant(apps, schema_editor):
+        SalesRollup = apps.get_model('foodcartapp', 'SalesRollup')
+        SalesRollup.objects.filter(restaurant__isnull=True).delete()
+
+    dependencies = [
+        ('foodcartapp', '0064_archived_item_product_protect'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_rollups_without_restaurant, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='salesrollup',
+            name='restaurant',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='sales_rollups', to='foodcartapp.restaurant', verbose_name='ресторан'),
+        ),
+    ]
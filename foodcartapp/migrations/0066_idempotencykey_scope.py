@@ -0,0 +1,29 @@
+# Idempotency keys are unique per endpoint and client, keys stored before
+# get an empty scope and never match again, they expire as usual
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0065_salesrollup_restaurant_protect'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='idempotencykey',
+            name='scope',
+            field=models.CharField(default='', help_text='Адрес запроса и клиент, которому принадлежит ключ', max_length=255, verbose_name='область действия'),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='idempotencykey',
+            name='key',
+            field=models.CharField(max_length=255, verbose_name='ключ идемпотентности'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='idempotencykey',
+            unique_together={('scope', 'key')},
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.2 on 2026-10-18 19:17
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0066_idempotencykey_scope'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='salesrollup',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='sales_rollups', to='foodcartapp.product', verbose_name='продукт'),
+        ),
+    ]
@@ -3,9 +3,10 @@ from phonenumber_field.modelfields import PhoneNumberField
 from django.db import models
 from django.core.validators import MinValueValidator
 from django.db.models import Sum, F, CharField
-from django.db.models.functions import Concat
-from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Concat, Coalesce, Now
+from django.db.models import OuterRef, Subquery, Exists, Q
 from django.contrib import admin
+from django.core.serializers.json import DjangoJSONEncoder
 
 from .validators import lat_validators, lng_validators
 
@@ -45,12 +46,30 @@ class Restaurant(models.Model):
 
 class ProductQuerySet(models.QuerySet):
     def available(self):
-        products = (
-            RestaurantMenuItem.objects
-            .filter(availability=True)
-            .values_list('product')
+        return self.filter(is_available_anywhere=True)
+
+    def with_actual_availability(self):
+        return self.annotate(
+            actual_availability=Exists(
+                RestaurantMenuItem.objects.filter(
+                    product=OuterRef('pk'),
+                    availability=True,
+                )
+            )
+        )
+
+    def refresh_availability(self):
+        """
+        Recalculate is_available_anywhere from restaurant menus.
+        """
+        return self.update(
+            is_available_anywhere=Exists(
+                RestaurantMenuItem.objects.filter(
+                    product=OuterRef('pk'),
+                    availability=True,
+                )
+            )
         )
-        return self.filter(pk__in=products)
 
 
 class ProductCategory(models.Model):
@@ -99,6 +118,12 @@ class Product(models.Model):
         default='',
         blank=True,
     )
+    is_available_anywhere = models.BooleanField(
+        'в продаже хотя бы в одном ресторане',
+        default=False,
+        db_index=True,
+        editable=False,
+    )
 
     objects = ProductQuerySet.as_manager()
 
@@ -110,6 +135,40 @@ class Product(models.Model):
         return self.name
 
 
+class RestaurantMenuItemQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        """
+        Update menu items and availability of their products.
+
+        Bulk updates bypass model signals, so product availability
+        and the catalog cache are refreshed here.
+        """
+        from .availability import bump_availability_version
+        from .catalog import bump_catalog_version
+
+        product_ids = set(self.values_list('product_id', flat=True))
+        updated_count = super().update(**kwargs)
+        product_ids.update(self.values_list('product_id', flat=True))
+        Product.objects.filter(id__in=product_ids).refresh_availability()
+        bump_catalog_version()
+        bump_availability_version()
+        return updated_count
+
+    update.alters_data = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        from .availability import bump_availability_version
+        from .catalog import bump_catalog_version
+
+        menu_items = super().bulk_create(objs, *args, **kwargs)
+        Product.objects.filter(
+            id__in={menu_item.product_id for menu_item in menu_items},
+        ).refresh_availability()
+        bump_catalog_version()
+        bump_availability_version()
+        return menu_items
+
+
 class RestaurantMenuItem(models.Model):
     restaurant = models.ForeignKey(
         Restaurant,
@@ -122,6 +181,7 @@ class RestaurantMenuItem(models.Model):
         on_delete=models.CASCADE,
         related_name='menu_items',
         verbose_name='продукт',
+        db_index=False,
     )
     availability = models.BooleanField(
         'в продаже',
@@ -129,16 +189,31 @@ class RestaurantMenuItem(models.Model):
         db_index=True
     )
 
+    objects = RestaurantMenuItemQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'пункт меню ресторана'
         verbose_name_plural = 'пункты меню ресторана'
         unique_together = [
             ['restaurant', 'product']
         ]
+        indexes = [
+            # Product availability lookups, leads with product
+            # so a separate product index is not needed
+            models.Index(fields=['product', 'availability'],
+                         name='menuitem_product_avail_idx',
+                         ),
+        ]
 
     def __str__(self):
         return f'{self.restaurant.name} - {self.product.name}'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        menu_item = super().from_db(db, field_names, values)
+        menu_item.loaded_product_id = menu_item.__dict__.get('product_id')
+        return menu_item
+
 
 class OrderProductItem(models.Model):
     order = models.ForeignKey('Order',
@@ -150,6 +225,7 @@ class OrderProductItem(models.Model):
                                 on_delete=models.CASCADE,
                                 verbose_name='продукт',
                                 related_name='items',
+                                db_index=False,
                                 )
     product_price = models.DecimalField(
         'цена',
@@ -165,17 +241,48 @@ class OrderProductItem(models.Model):
     class Meta:
         verbose_name = 'позиция в заказе'
         verbose_name_plural = 'позиции в заказе'
+        indexes = [
+            # Orders of a product are found without touching the table
+            models.Index(fields=['product', 'order'], name='item_product_order_idx'),
+        ]
 
     def __str__(self):
         return f'{self.order} - {self.product.name}'
 
 
-class OrderManager(models.Manager):
+class OrderQuerySet(models.QuerySet):
 
-    def get_queryset(self):
-        return super().get_queryset().annotate(
-            sum=Sum(F('items__product_price') * F('items__quantity'))
+    def with_live_total(self):
+        """
+        Annotate orders with total calculated from their items.
+        """
+        return self.annotate(
+            live_total=Coalesce(
+                Sum(F('items__product_price') * F('items__quantity')),
+                0,
+                output_field=models.DecimalField(),
             )
+        )
+
+    def refresh_totals(self):
+        """
+        Recalculate stored total of orders from their items.
+        """
+        items_totals = (
+            OrderProductItem.objects
+            .filter(order=OuterRef('pk'))
+            .order_by()
+            .values('order')
+            .annotate(total=Sum(F('product_price') * F('quantity')))
+            .values('total')
+        )
+        return self.update(
+            total=Coalesce(
+                Subquery(items_totals, output_field=models.DecimalField()),
+                0,
+            ),
+            updated_at=Now(),
+        )
 
 
 class Order(models.Model):
@@ -186,6 +293,13 @@ class Order(models.Model):
         ('completed', 'выполнен'),
     ]
 
+    GEOCODING_STATUSES = [
+        ('pending', 'ожидает геокодирования'),
+        ('done', 'координаты определены'),
+        ('not_found', 'адрес не найден'),
+        ('failed', 'ошибка геокодирования'),
+    ]
+
     PAYMENT_METHOD = [
         ('cash', 'наличный'),
         ('cashless', 'безналичный'),
@@ -209,7 +323,6 @@ class Order(models.Model):
                                       )
     updated_at = models.DateTimeField(auto_now=True, 
                                       verbose_name='Время редактирования',
-                                      db_index=True,
                                       )
     called_at = models.DateTimeField(verbose_name='Дата и время звонка клиенту', 
                                      null=True, 
@@ -225,12 +338,10 @@ class Order(models.Model):
                               max_length=32,
                               choices=STATUSES,
                               default='unprocessed',
-                              db_index=True,
                               )
     payment_method = models.CharField('Способ оплаты', 
                                       max_length=32,
                                       choices=PAYMENT_METHOD,
-                                      db_index=True,
                                       )
     comment = models.TextField('Комментарий',
                                blank=True,
@@ -254,16 +365,86 @@ class Order(models.Model):
                                   null=True,
                                   blank=True,
                                   )
+    geocoding_status = models.CharField('Статус геокодирования',
+                                        max_length=32,
+                                        choices=GEOCODING_STATUSES,
+                                        default='pending',
+                                        )
+
+    total = models.DecimalField('Сумма заказа',
+                                max_digits=10,
+                                decimal_places=2,
+                                default=0,
+                                db_index=True,
+                                editable=False,
+                                )
 
-    objects = OrderManager()
+    objects = OrderQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Заказ'
         verbose_name_plural = 'Заказы'
+        indexes = [
+            # Orders board filtered by status, keyset paginated
+            models.Index(fields=['status', 'created_at', 'id'],
+                         name='order_status_created_idx',
+                         ),
+            # Default orders board, completed orders are the bulk
+            # of the table and never shown there
+            models.Index(fields=['created_at', 'id'],
+                         condition=~Q(status='completed'),
+                         name='order_open_created_idx',
+                         ),
+            # Stream of order changes, keyset paginated
+            models.Index(fields=['updated_at', 'id'], name='order_updated_idx'),
+        ]
+
+    @admin.display(description='Имя заказчика')
+    def customer_name(self):
+        return f'{self.firstname} {self.lastname}'
+
+    def __str__(self):
+        return f'{self.firstname} {self.lastname} > {self.address} '
+
 
-    @admin.display(description='Сумма заказа')
-    def amount(self):
-        return self.sum
+class ArchivedOrder(models.Model):
+    """
+    Completed order moved out of the hot orders table.
+
+    Keeps the ID, customer, delivery and payment details of the original
+    order, see the archive_orders command.
+    """
+    id = models.IntegerField('ID заказа', primary_key=True)
+    firstname = models.CharField('Имя заказчика', max_length=32)
+    lastname = models.CharField('Фамилия заказчика', max_length=32)
+    phonenumber = PhoneNumberField('Телефон заказчика', db_index=True)
+    address = models.CharField('Адрес доставки', max_length=255)
+    created_at = models.DateTimeField('Время создания', db_index=True)
+    updated_at = models.DateTimeField('Время редактирования')
+    called_at = models.DateTimeField('Дата и время звонка клиенту', null=True, blank=True)
+    delivered_at = models.DateTimeField('Дата и время доставки клиенту', null=True, blank=True)
+    status = models.CharField('Статус', max_length=32, choices=Order.STATUSES)
+    payment_method = models.CharField('Способ оплаты',
+                                      max_length=32,
+                                      choices=Order.PAYMENT_METHOD,
+                                      )
+    comment = models.TextField('Комментарий', blank=True)
+    restaurant = models.ForeignKey(
+        Restaurant,
+        related_name='archived_orders',
+        verbose_name='Ресторан',
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+    )
+    latitude = models.FloatField('Широта', null=True, blank=True)
+    longitude = models.FloatField('Долгота', null=True, blank=True)
+    total = models.DecimalField('Сумма заказа', max_digits=10, decimal_places=2)
+    archived_at = models.DateTimeField('Время архивации', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'архивный заказ'
+        verbose_name_plural = 'архивные заказы'
 
     @admin.display(description='Имя заказчика')
     def customer_name(self):
@@ -272,3 +453,97 @@ class Order(models.Model):
     def __str__(self):
         return f'{self.firstname} {self.lastname} > {self.address} '
 
+
+class ArchivedOrderProductItem(models.Model):
+    id = models.IntegerField('ID позиции', primary_key=True)
+    order = models.ForeignKey(ArchivedOrder,
+                              verbose_name='заказ',
+                              related_name='items',
+                              on_delete=models.CASCADE,
+                              )
+    product = models.ForeignKey(Product,
+                                on_delete=models.PROTECT,
+                                verbose_name='продукт',
+                                related_name='archived_items',
+                                )
+    product_price = models.DecimalField('цена', max_digits=8, decimal_places=2)
+    quantity = models.PositiveSmallIntegerField('количество')
+
+    class Meta:
+        verbose_name = 'позиция в архивном заказе'
+        verbose_name_plural = 'позиции в архивном заказе'
+
+    def __str__(self):
+        return f'{self.order} - {self.product.name}'
+
+
+class IdempotencyKey(models.Model):
+    scope = models.CharField(
+        'область действия',
+        max_length=255,
+        help_text='Адрес запроса и клиент, которому принадлежит ключ',
+    )
+    key = models.CharField(
+        'ключ идемпотентности',
+        max_length=255,
+    )
+    request_fingerprint = models.CharField(
+        'хеш запроса',
+        max_length=64,
+    )
+    status_code = models.PositiveSmallIntegerField(
+        'код ответа',
+    )
+    response = models.JSONField(
+        'ответ',
+        encoder=DjangoJSONEncoder,
+    )
+    expires_at = models.DateTimeField(
+        'действует до',
+        db_index=True,
+    )
+
+    class Meta:
+        verbose_name = 'ключ идемпотентности'
+        verbose_name_plural = 'ключи идемпотентности'
+        unique_together = [
+            ['scope', 'key']
+        ]
+
+    def __str__(self):
+        return self.key
+
+
+class SalesRollup(models.Model):
+    """
+    Sales of a product by a restaurant during a day.
+
+    Only completed orders with a restaurant are counted, on the day
+    the order was created. Rows are kept up to date by signals and can
+    be rebuilt with the rebuild_sales_rollups command.
+    """
+    day = models.DateField('день')
+    restaurant = models.ForeignKey(
+        Restaurant,
+        related_name='sales_rollups',
+        verbose_name='ресторан',
+        on_delete=models.PROTECT,
+    )
+    product = models.ForeignKey(
+        Product,
+        related_name='sales_rollups',
+        verbose_name='продукт',
+        on_delete=models.PROTECT,
+    )
+    quantity = models.IntegerField('количество', default=0)
+    revenue = models.DecimalField('выручка', max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = 'продажи за день'
+        verbose_name_plural = 'продажи по дням'
+        unique_together = [
+            ['day', 'restaurant', 'product']
+        ]
+
+    def __str__(self):
+        return f'{self.day} {self.restaurant} - {self.product}'
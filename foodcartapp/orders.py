@@ -0,0 +1,47 @@
+from django.db import connection, transaction
+
+from restaurateur.geocoding_jobs import enqueue_orders_geocoding
+from .models import Order, OrderProductItem
+
+
+def create_orders(validated_orders) -> list:
+    """
+    Save orders validated by OrderSerializer together with their items.
+
+    All orders and all items are inserted with one bulk_create each,
+    order totals are calculated beforehand.
+    Databases unable to return primary keys from a bulk insert get
+    orders inserted one by one.
+    """
+    orders = []
+    orders_items = []
+    for order_fields in validated_orders:
+        order_fields = dict(order_fields)
+        products = order_fields.pop('products')
+        total = sum(
+            product_item['product'].price * product_item['quantity']
+            for product_item in products
+            )
+        orders_items.append(products)
+        orders.append(Order(total=total, **order_fields))
+
+    with transaction.atomic():
+        if connection.features.can_return_rows_from_bulk_insert:
+            Order.objects.bulk_create(orders)
+        else:
+            for order in orders:
+                order.save()
+
+        order_product_items = []
+        for order, products in zip(orders, orders_items):
+            for product_item in products:
+                product = product_item['product']
+                order_product_items.append(OrderProductItem(product=product,
+                                                            product_price=product.price,
+                                                            quantity=product_item['quantity'],
+                                                            order=order,
+                                                            )
+                                           )
+        OrderProductItem.objects.bulk_create(order_product_items)
+        enqueue_orders_geocoding(orders)
+    return orders
@@ -1,34 +1,37 @@
-from django.db import models
+from collections import defaultdict
 
-from .models import Restaurant, Product, RestaurantMenuItem
+from .availability import get_availability_matrix
+from .fulfillment import get_fulfilling_restaurants
+from .models import OrderProductItem
 
 
-def get_restaurants_with_order_products(order_id: int) -> models.QuerySet:
+def get_restaurants_for_orders(order_ids) -> dict:
     """
-    Return restaurants with complete set of products in order with ID=order_id.
+    Return restaurants able to cook every product of each order.
+
+    Result maps order ID to a list of restaurants ordered by name.
+    A restaurant is eligible only if it has an available menu item
+    for every product in the order, a missing menu item counts
+    as "not available". Costs a single query for order items, menu
+    availability comes from the cached availability matrix.
     """
-    restaurants = Restaurant.objects.prefetch_related(
-        'menu_items'
-        ).order_by('name')
-    products = Product.objects.prefetch_related('items')
-    products_in_order = products.filter(
-        items__order=order_id,
-        ).order_by('name').values_list('id')
-    menu_items = RestaurantMenuItem.objects.all()
+    order_ids = list(order_ids)
+    if not order_ids:
+        return {}
 
-    is_product_in_restaurant = {}
-    for restaurant in restaurants:
-        is_product_in_restaurant[
-            restaurant.id
-            ] = [
-                item.availability for item in menu_items.filter(
-                    product__in=products_in_order, restaurant=restaurant,
-                    ).order_by('product__name')
-                    ]
+    products_by_order = defaultdict(set)
+    order_items = OrderProductItem.objects.filter(
+        order__in=order_ids,
+        ).values_list('order_id', 'product_id')
+    for order_id, product_id in order_items:
+        products_by_order[order_id].add(product_id)
 
-    restaurants_with_complete_set = [
-        restaurant.id for restaurant in restaurants if all(
-            is_product_in_restaurant[restaurant.id]
-            )
-            ]
-    return restaurants.filter(id__in=restaurants_with_complete_set)
+    matrix = get_availability_matrix()
+    restaurants_by_products = {}
+    restaurants_by_order = {}
+    for order_id in order_ids:
+        product_ids = frozenset(products_by_order[order_id])
+        if product_ids not in restaurants_by_products:
+            restaurants_by_products[product_ids] = get_fulfilling_restaurants(product_ids, matrix)
+        restaurants_by_order[order_id] = restaurants_by_products[product_ids]
+    return restaurants_by_order
@@ -1,8 +1,36 @@
 from rest_framework.serializers import ModelSerializer, ListField
+from rest_framework.serializers import IntegerField, ValidationError
 from .models import Order, OrderProductItem, Product
 
 
+# Largest primary key the database integer column holds
+MAX_PRODUCT_ID = 2 ** 31 - 1
+
+
+def get_requested_product_ids(orders_data) -> set:
+    """
+    Collect product IDs from raw, not yet validated orders.
+
+    IDs out of the primary key range are skipped, validation rejects them.
+    """
+    product_ids = set()
+    for order_data in orders_data:
+        if not isinstance(order_data, dict) or not isinstance(order_data.get('products'), list):
+            continue
+        for product_item in order_data['products']:
+            if not isinstance(product_item, dict):
+                continue
+            try:
+                product_id = int(product_item.get('product'))
+            except (TypeError, ValueError):
+                continue
+            if 1 <= product_id <= MAX_PRODUCT_ID:
+                product_ids.add(product_id)
+    return product_ids
+
+
 class OrderProductItemSerializer(ModelSerializer):
+    product = IntegerField(min_value=1, max_value=MAX_PRODUCT_ID)
 
     class Meta:
         model = OrderProductItem
@@ -13,6 +41,13 @@ class OrderProductItemSerializer(ModelSerializer):
 
 
 class OrderSerializer(ModelSerializer):
+    """
+    Order with its products.
+
+    Products of all items are fetched with a single query. Pass
+    {'products': Product.objects.in_bulk(...)} in the context to share
+    one query between several orders.
+    """
     products = OrderProductItemSerializer(many=True, 
                                           allow_empty=False, 
                                           write_only=True
@@ -29,3 +64,23 @@ class OrderSerializer(ModelSerializer):
             'address'
             ]
 
+    def validate_products(self, product_items):
+        products = self.context.get('products', {})
+        product_ids = {product_item['product'] for product_item in product_items}
+        missing_ids = product_ids - set(products)
+        if missing_ids:
+            products = {**products, **Product.objects.in_bulk(missing_ids)}
+
+        errors = []
+        for product_item in product_items:
+            product_id = product_item['product']
+            if product_id in products:
+                product_item['product'] = products[product_id]
+                errors.append({})
+            else:
+                errors.append({'product': [
+                    f'Недопустимый первичный ключ "{product_id}" - объект не существует.'
+                    ]})
+        if any(errors):
+            raise ValidationError(errors)
+        return product_items
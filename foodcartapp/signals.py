@@ -0,0 +1,95 @@
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+
+from .analytics import add_to_rollups, get_order_rollup_key, get_rollup_key
+from .archive import archiving_orders
+from .availability import bump_availability_version
+from .catalog import bump_catalog_version
+from .models import Product, ProductCategory, Restaurant, RestaurantMenuItem
+from .models import Order, OrderProductItem
+
+
+@receiver(post_save, sender=RestaurantMenuItem)
+@receiver(post_delete, sender=RestaurantMenuItem)
+def refresh_product_availability(sender, instance, **kwargs):
+    product_ids = {instance.product_id, getattr(instance, 'loaded_product_id', None)}
+    Product.objects.filter(id__in=product_ids - {None}).refresh_availability()
+    instance.loaded_product_id = instance.product_id
+
+
+@receiver(post_save, sender=OrderProductItem)
+@receiver(post_delete, sender=OrderProductItem)
+def refresh_order_total(sender, instance, **kwargs):
+    if archiving_orders.get():
+        return
+    Order.objects.filter(id=instance.order_id).refresh_totals()
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductCategory)
+@receiver(post_delete, sender=ProductCategory)
+@receiver(post_save, sender=RestaurantMenuItem)
+@receiver(post_delete, sender=RestaurantMenuItem)
+def invalidate_catalog(sender, **kwargs):
+    bump_catalog_version()
+
+
+@receiver(post_save, sender=Restaurant)
+@receiver(post_delete, sender=Restaurant)
+@receiver(post_save, sender=RestaurantMenuItem)
+@receiver(post_delete, sender=RestaurantMenuItem)
+def invalidate_availability_matrix(sender, **kwargs):
+    bump_availability_version()
+
+
+@receiver(pre_save, sender=Order)
+def remember_order_rollup_key(sender, instance, **kwargs):
+    instance.saved_rollup_key = instance.pk and get_order_rollup_key(instance.pk)
+
+
+@receiver(post_save, sender=Order)
+def update_order_sales_rollups(sender, instance, **kwargs):
+    """
+    Move order sales between rollups when it gets or stops being completed.
+    """
+    old_key = getattr(instance, 'saved_rollup_key', None)
+    new_key = get_rollup_key(instance.status, instance.restaurant_id, instance.created_at)
+    if old_key == new_key:
+        return
+    items = list(instance.items.values_list('product_id', 'quantity', 'product_price'))
+    if old_key:
+        add_to_rollups(old_key, items, sign=-1)
+    if new_key:
+        add_to_rollups(new_key, items)
+
+
+@receiver(pre_save, sender=OrderProductItem)
+def remember_saved_order_item(sender, instance, **kwargs):
+    instance.saved_item = instance.pk and OrderProductItem.objects.filter(
+        pk=instance.pk,
+    ).values_list('order_id', 'product_id', 'quantity', 'product_price').first()
+
+
+@receiver(post_save, sender=OrderProductItem)
+def update_item_sales_rollups(sender, instance, **kwargs):
+    if instance.saved_item:
+        order_id, *item = instance.saved_item
+        rollup_key = get_order_rollup_key(order_id)
+        if rollup_key:
+            add_to_rollups(rollup_key, [item], sign=-1)
+    rollup_key = get_order_rollup_key(instance.order_id)
+    if rollup_key:
+        add_to_rollups(rollup_key, [(instance.product_id, instance.quantity, instance.product_price)])
+
+
+@receiver(post_delete, sender=OrderProductItem)
+def subtract_item_sales_rollups(sender, instance, **kwargs):
+    if archiving_orders.get():
+        return
+    rollup_key = get_order_rollup_key(instance.order_id)
+    if rollup_key:
+        add_to_rollups(rollup_key,
+                       [(instance.product_id, instance.quantity, instance.product_price)],
+                       sign=-1,
+                       )
@@ -0,0 +1,46 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+
+def iter_json_array(items, serialize, items_per_chunk=100):
+    """
+    Encode items as a JSON array yielding it by chunks of bytes.
+    """
+    encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    yield b'['
+    chunk = []
+    separator = ''
+    for item in items:
+        chunk.append(separator + encoder.encode(serialize(item)))
+        separator = ','
+        if len(chunk) >= items_per_chunk:
+            yield ''.join(chunk).encode()
+            chunk = []
+    yield (''.join(chunk) + ']').encode()
+
+
+def iter_by_keyset(queryset, chunk_size):
+    """
+    Yield lists of objects of the queryset ordered by primary key.
+
+    Every chunk is selected with its own `pk > last_pk` query,
+    so neither the database nor Python hold the whole result.
+    """
+    queryset = queryset.order_by('pk')
+    last_pk = None
+    while True:
+        chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        chunk = list(chunk[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_item = chunk[-1]
+        last_pk = last_item['id'] if isinstance(last_item, dict) else last_item.pk
+
+
+def stream_json_response(items, serialize, **kwargs):
+    return StreamingHttpResponse(
+        iter_json_array(items, serialize),
+        content_type='application/json',
+        **kwargs
+    )
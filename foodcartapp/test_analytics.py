@@ -0,0 +1,121 @@
+"""
+Test of sales rollups and the analytics API
+"""
+import io
+import json
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db.models import ProtectedError
+from django.test import TestCase
+from django.utils import timezone
+
+from .models import Order, OrderProductItem, Product, Restaurant, SalesRollup
+
+
+class TestSalesRollups(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.restaurant = Restaurant.objects.create(name='Ресторан', address='Адрес')
+        cls.burger = Product.objects.create(name='Бургер', price=300)
+        cls.fries = Product.objects.create(name='Картофель фри', price=100)
+
+    def create_order(self, status='unprocessed', restaurant=True):
+        order = Order.objects.create(firstname='Vasya',
+                                     lastname='Petrov',
+                                     phonenumber='+79311234567',
+                                     address='Дыбенко',
+                                     payment_method='cash',
+                                     status=status,
+                                     restaurant=self.restaurant if restaurant else None,
+                                     )
+        OrderProductItem.objects.bulk_create([
+            OrderProductItem(order=order, product=product, product_price=product.price, quantity=2)
+            for product in (self.burger, self.fries)
+        ])
+        return order
+
+    def get_rollups(self):
+        return sorted(
+            SalesRollup.objects.filter(quantity__gt=0).values_list('product__name', 'quantity', 'revenue')
+        )
+
+    def test_completed_order_is_rolled_up(self):
+        order = self.create_order()
+        self.assertEqual(self.get_rollups(), [])
+
+        order.status = 'completed'
+        order.save()
+        self.assertEqual(self.get_rollups(), [('Бургер', 2, 600), ('Картофель фри', 2, 200)])
+
+        item = order.items.get(product=self.fries)
+        item.quantity = 3
+        item.save()
+        order.items.get(product=self.burger).delete()
+        self.assertEqual(self.get_rollups(), [('Картофель фри', 3, 300)])
+
+        order.status = 'delivering'
+        order.save()
+        self.assertEqual(self.get_rollups(), [])
+
+    def test_order_without_restaurant_is_not_rolled_up(self):
+        order = self.create_order(restaurant=False)
+        order.status = 'completed'
+        order.save()
+        order.items.create(product=self.burger, product_price=self.burger.price, quantity=1)
+        self.assertEqual(SalesRollup.objects.count(), 0)
+
+        call_command('rebuild_sales_rollups', stdout=io.StringIO())
+        self.assertEqual(SalesRollup.objects.count(), 0)
+
+        order.restaurant = self.restaurant
+        order.save()
+        self.assertEqual(self.get_rollups(), [('Бургер', 3, 900), ('Картофель фри', 2, 200)])
+
+    def test_restaurant_and_product_with_sales_are_protected(self):
+        order = self.create_order()
+        order.status = 'completed'
+        order.save()
+
+        with self.assertRaises(ProtectedError):
+            self.restaurant.delete()
+        with self.assertRaises(ProtectedError):
+            self.burger.delete()
+
+    def test_rebuild_counts_archived_orders(self):
+        archived_order = self.create_order('completed')
+        Order.objects.filter(id=archived_order.id).update(
+            created_at=timezone.now() - timedelta(days=365),
+        )
+        call_command('archive_orders', stdout=io.StringIO())
+        order = self.create_order()
+        order.status = 'completed'
+        order.save()
+
+        call_command('rebuild_sales_rollups', stdout=io.StringIO())
+
+        self.assertEqual(SalesRollup.objects.count(), 4)
+        self.assertEqual(self.get_rollups(), [('Бургер', 2, 600),
+                                              ('Бургер', 2, 600),
+                                              ('Картофель фри', 2, 200),
+                                              ('Картофель фри', 2, 200),
+                                              ])
+
+    def test_api_reads_only_rollups(self):
+        order = self.create_order()
+        order.status = 'completed'
+        order.save()
+        self.client.force_login(User.objects.create_user('manager', is_staff=True))
+
+        # Сессия, пользователь и три запроса к сводкам
+        with self.assertNumQueries(5):
+            response = self.client.get('/manager/analytics/sales.json')
+
+        report = json.loads(response.content)
+        self.assertEqual(Decimal(report['revenue']), 800)
+        self.assertEqual([product['name'] for product in report['products']],
+                         ['Бургер', 'Картофель фри'],
+                         )
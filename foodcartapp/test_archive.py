@@ -0,0 +1,113 @@
+"""
+Test of the order archive
+"""
+import io
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db.models import ProtectedError, Sum
+from django.test import TestCase
+from django.utils import timezone
+
+from .models import ArchivedOrder, ArchivedOrderProductItem, Order, OrderProductItem
+from .models import Product, Restaurant, SalesRollup
+
+
+class TestArchiveOrders(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.product = product = Product.objects.create(name='Бургер', price=369)
+        restaurant = Restaurant.objects.create(name='Ресторан', address='Адрес')
+        for status, age_days in [('completed', 100),
+                                 ('completed', 120),
+                                 ('completed', 10),
+                                 ('delivering', 100)]:
+            order = Order.objects.create(firstname='Vasya',
+                                         lastname='Petrov',
+                                         phonenumber='+79311234567',
+                                         address='Дыбенко',
+                                         payment_method='cash',
+                                         status=status,
+                                         restaurant=restaurant,
+                                         )
+            OrderProductItem.objects.create(order=order,
+                                            product=product,
+                                            product_price=product.price,
+                                            quantity=2,
+                                            )
+            Order.objects.filter(id=order.id).update(
+                created_at=timezone.now() - timedelta(days=age_days),
+            )
+
+    def test_old_completed_orders_are_moved(self):
+        old_order_ids = set(
+            Order.objects.filter(
+                status='completed',
+                created_at__lt=timezone.now() - timedelta(days=90),
+            ).values_list('id', flat=True)
+        )
+
+        # Одна пачка за запуск: второй запуск продолжает с того же места
+        call_command('archive_orders', batch_size=1, max_batches=1, stdout=io.StringIO())
+        call_command('archive_orders', batch_size=1, stdout=io.StringIO())
+
+        self.assertEqual(set(ArchivedOrder.objects.values_list('id', flat=True)), old_order_ids)
+        self.assertFalse(Order.objects.filter(id__in=old_order_ids).exists())
+        self.assertEqual(Order.objects.count(), 2)
+        archived_order = ArchivedOrder.objects.first()
+        self.assertEqual(archived_order.total, 738)
+        self.assertEqual(ArchivedOrderProductItem.objects.filter(order=archived_order).count(), 1)
+
+    def test_archived_orders_keep_rollups(self):
+        rollups_before = SalesRollup.objects.aggregate(quantity=Sum('quantity'), revenue=Sum('revenue'))
+
+        call_command('archive_orders', stdout=io.StringIO())
+
+        self.assertEqual(ArchivedOrder.objects.count(), 2)
+        self.assertEqual(SalesRollup.objects.aggregate(quantity=Sum('quantity'), revenue=Sum('revenue')),
+                         rollups_before,
+                         )
+
+    def test_already_archived_order_aborts_batch(self):
+        order = Order.objects.filter(status='completed').order_by('created_at').first()
+        ArchivedOrder.objects.create(id=order.id,
+                                     firstname=order.firstname,
+                                     lastname=order.lastname,
+                                     phonenumber=order.phonenumber,
+                                     address=order.address,
+                                     created_at=order.created_at,
+                                     updated_at=order.updated_at,
+                                     status=order.status,
+                                     payment_method=order.payment_method,
+                                     total=order.total,
+                                     )
+
+        with self.assertRaises(CommandError):
+            call_command('archive_orders', stdout=io.StringIO())
+
+        # Пачка откатилась целиком, ни один заказ не потерян
+        self.assertEqual(Order.objects.count(), 4)
+        self.assertEqual(OrderProductItem.objects.count(), 4)
+        self.assertEqual(ArchivedOrderProductItem.objects.count(), 0)
+
+    def test_archived_product_is_protected(self):
+        call_command('archive_orders', stdout=io.StringIO())
+        OrderProductItem.objects.filter(product=self.product).delete()
+
+        with self.assertRaises(ProtectedError):
+            self.product.delete()
+
+    def test_admin_is_read_only(self):
+        call_command('archive_orders', stdout=io.StringIO())
+        admin_user = User.objects.create_superuser('admin', password='pw')
+        self.client.force_login(admin_user)
+        archived_order = ArchivedOrder.objects.first()
+
+        response = self.client.get('/admin/foodcartapp/archivedorder/')
+        self.assertContains(response, archived_order.address)
+
+        response = self.client.get(f'/admin/foodcartapp/archivedorder/{archived_order.id}/change/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context['has_change_permission'])
@@ -0,0 +1,82 @@
+"""
+Test of the product availability matrix
+"""
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from .availability import AVAILABILITY_VERSION_KEY, AvailabilityMatrix, get_availability_matrix
+from .models import Product, Restaurant, RestaurantMenuItem
+
+
+class TestAvailabilityMatrix(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.burger = Product.objects.create(name='Бургер', price=369)
+        cls.fries = Product.objects.create(name='Картофель фри', price=99)
+        cls.first = Restaurant.objects.create(name='Первый', address='Адрес 1')
+        cls.second = Restaurant.objects.create(name='Второй', address='Адрес 2')
+
+        RestaurantMenuItem.objects.create(restaurant=cls.first, product=cls.burger)
+        RestaurantMenuItem.objects.create(restaurant=cls.second, product=cls.burger)
+        RestaurantMenuItem.objects.create(restaurant=cls.second,
+                                          product=cls.fries,
+                                          availability=False,
+                                          )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_rows_follow_restaurant_names(self):
+        matrix = get_availability_matrix()
+
+        self.assertEqual(matrix.restaurants, [self.second, self.first])
+        self.assertEqual(matrix.get_row(self.burger.id), [True, True])
+        self.assertEqual(matrix.get_row(self.fries.id), [False, False])
+
+    def test_cached_matrix_does_not_touch_db(self):
+        get_availability_matrix()
+
+        with self.assertNumQueries(0):
+            get_availability_matrix()
+
+    def test_menu_change_invalidates_matrix(self):
+        get_availability_matrix()
+
+        RestaurantMenuItem.objects.filter(product=self.fries).update(availability=True)
+        self.assertEqual(get_availability_matrix().get_row(self.fries.id), [True, False])
+
+        RestaurantMenuItem.objects.get(restaurant=self.first).delete()
+        self.assertEqual(get_availability_matrix().get_row(self.burger.id), [True, False])
+
+    def test_restaurant_added_during_build_is_skipped(self):
+        restaurants = list(Restaurant.objects.order_by('name'))
+        third = Restaurant.objects.create(name='Третий', address='Адрес 3')
+        RestaurantMenuItem.objects.create(restaurant=third, product=self.fries)
+
+        # Ресторан появился между запросом ресторанов и запросом меню
+        with mock.patch('foodcartapp.availability.Restaurant') as restaurant_model:
+            restaurant_model.objects.order_by.return_value = restaurants
+            matrix = AvailabilityMatrix.build()
+
+        self.assertEqual(matrix.restaurants, [self.second, self.first])
+        self.assertEqual(matrix.get_row(self.fries.id), [False, False])
+
+    @override_settings(CATALOG_CACHE_TTL=60)
+    def test_change_from_other_process_appears_after_ttl(self):
+        matrix = get_availability_matrix()
+
+        third = Restaurant.objects.create(name='Третий', address='Адрес 3')
+        RestaurantMenuItem.objects.create(restaurant=third, product=self.fries)
+        # Изменение сделал другой процесс, у которого свой кэш в памяти
+        cache.set(AVAILABILITY_VERSION_KEY, matrix.version)
+        self.assertIs(get_availability_matrix(), matrix)
+
+        with mock.patch('foodcartapp.availability.time.time', return_value=time.time() + 61):
+            matrix = get_availability_matrix()
+
+        self.assertEqual(matrix.restaurants, [self.second, self.first, third])
+        self.assertEqual(matrix.get_row(self.fries.id), [False, False, True])
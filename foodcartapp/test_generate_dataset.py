@@ -0,0 +1,52 @@
+"""
+Test of the generate_dataset management command
+"""
+import io
+import tempfile
+
+from django.core.management import call_command
+from django.db.models import F, Sum
+from django.test import TestCase, override_settings
+
+from .models import Order, OrderProductItem, Product, Restaurant, RestaurantMenuItem, SalesRollup
+
+
+class TestGenerateDataset(TestCase):
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_dataset(self):
+        call_command('generate_dataset',
+                     restaurants=3,
+                     products=10,
+                     orders=25,
+                     chunk_size=10,
+                     stdout=io.StringIO(),
+                     )
+
+        self.assertEqual(Restaurant.objects.filter(latitude__isnull=False).count(), 3)
+        self.assertEqual(RestaurantMenuItem.objects.count(), 9)
+        self.assertTrue(Product.objects.available().exists())
+        self.assertEqual(Order.objects.count(), 25)
+        self.assertFalse(Order.objects.with_live_total().exclude(total=F('live_total')).exists())
+        # Заказы растянуты на полгода, а не созданы в момент загрузки
+        first_order, last_order = Order.objects.order_by('id')[::24]
+        self.assertGreater((last_order.created_at - first_order.created_at).days, 150)
+        self.assertTrue(OrderProductItem.objects.filter(order=last_order).exists())
+        self.assertEqual(
+            SalesRollup.objects.aggregate(revenue=Sum('revenue'))['revenue'],
+            Order.objects.filter(status='completed').aggregate(revenue=Sum('total'))['revenue'],
+        )
+
+        order = Order.objects.create(firstname='Vasya',
+                                     lastname='Petrov',
+                                     phonenumber='+79311234567',
+                                     address='Дыбенко',
+                                     payment_method='cash',
+                                     )
+        self.assertEqual(order.id, last_order.id + 1)
@@ -0,0 +1,32 @@
+"""
+Test of the load testing harness against a live server
+"""
+from django.test import LiveServerTestCase
+
+from .loadtest import run_load_test
+from .models import Order, Product, Restaurant, RestaurantMenuItem
+
+
+class TestLoadTest(LiveServerTestCase):
+
+    def setUp(self):
+        restaurant = Restaurant.objects.create(name='Ресторан', address='Адрес')
+        for name in ('Бургер', 'Картофель фри', 'Кола'):
+            product = Product.objects.create(name=name, price=100, image='burger.jpg')
+            RestaurantMenuItem.objects.create(restaurant=restaurant, product=product)
+
+    def test_report(self):
+        # Тестовая база SQLite в памяти не переносит параллельных записей
+        report = run_load_test(self.live_server_url,
+                               sessions=4,
+                               concurrency=1,
+                               order_share=1,
+                               seed=1,
+                               )
+
+        self.assertEqual(report['checkouts'], 4)
+        self.assertEqual(Order.objects.count(), 4)
+        self.assertEqual(set(report['endpoints']),
+                         {'GET /api/products/', 'GET /api/banners/', 'POST /api/order/'},
+                         )
+        self.assertEqual(report['endpoints']['POST /api/order/']['error_rate'], 0)
@@ -0,0 +1,101 @@
+"""
+Test of product_list_api() and product availability
+"""
+import json
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from .catalog import get_catalog, get_catalog_version
+from .models import Product, ProductCategory, Restaurant, RestaurantMenuItem
+
+
+class TestProductListApi(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = ProductCategory.objects.create(name='Бургеры')
+        cls.restaurant = Restaurant.objects.create(name='Ресторан', address='Адрес')
+        cls.burger = Product.objects.create(category=category,
+                                            name='Бургер',
+                                            price=369,
+                                            image='burger.jpg',
+                                            )
+        RestaurantMenuItem.objects.create(restaurant=cls.restaurant, product=cls.burger)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_catalog_is_served_from_cache(self):
+        self.client.get('/api/products/')
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/products/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([product['name'] for product in json.loads(response.content)],
+                         ['Бургер'],
+                         )
+
+    def test_not_modified(self):
+        etag = self.client.get('/api/products/')['ETag']
+
+        response = self.client.get('/api/products/', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_catalog_is_read_once_per_request(self):
+        with mock.patch('foodcartapp.views.get_catalog', wraps=get_catalog) as catalog:
+            etag = self.client.get('/api/products/')['ETag']
+            self.client.get('/api/products/', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(catalog.call_count, 2)
+
+    def test_menu_change_invalidates_catalog(self):
+        etag = self.client.get('/api/products/')['ETag']
+
+        fries = Product.objects.create(name='Картофель фри', price=99, image='fries.jpg')
+        RestaurantMenuItem.objects.create(restaurant=self.restaurant, product=fries)
+        response = self.client.get('/api/products/', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(json.loads(response.content)), 2)
+
+    def test_catalog_is_invalidated_again_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            burger = Product.objects.get(id=self.burger.id)
+            burger.name = 'Чизбургер'
+            burger.save()
+            # Параллельный запрос успел закэшировать каталог без изменения
+            cache.set(f'catalog:{get_catalog_version()}', ('"stale"', b'[]'))
+
+        response = self.client.get('/api/products/')
+
+        self.assertEqual([product['name'] for product in json.loads(response.content)],
+                         ['Чизбургер'],
+                         )
+
+    def test_bulk_update_hides_product(self):
+        RestaurantMenuItem.objects.filter(product=self.burger).update(availability=False)
+
+        response = self.client.get('/api/products/')
+
+        self.assertEqual(json.loads(response.content), [])
+
+    def test_moving_menu_item_refreshes_both_products(self):
+        fries = Product.objects.create(name='Картофель фри', price=99, image='fries.jpg')
+        menu_item = RestaurantMenuItem.objects.get(product=self.burger)
+        menu_item.product = fries
+        menu_item.save()
+
+        self.assertQuerysetEqual(Product.objects.available(), [fries])
+
+    def test_streaming_mode(self):
+        response = self.client.get('/api/products/', {'stream': 1})
+
+        content = b''.join(response.streaming_content)
+        self.assertEqual(json.loads(content),
+                         json.loads(self.client.get('/api/products/').content),
+                         )
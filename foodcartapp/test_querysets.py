@@ -0,0 +1,95 @@
+"""
+Test of get_restaurants_for_orders() and query plans of hot queries
+"""
+import io
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from .models import Product, ProductCategory, Restaurant, RestaurantMenuItem
+from .models import Order, OrderProductItem
+from .querysets import get_restaurants_for_orders
+
+
+class TestRestaurantsForOrders(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = ProductCategory.objects.create(name='Бургеры')
+        cls.burger = Product.objects.create(category=category,
+                                            name='Бургер',
+                                            price=369,
+                                            )
+        cls.fries = Product.objects.create(category=category,
+                                           name='Картофель фри',
+                                           price=99,
+                                           )
+        cls.full = Restaurant.objects.create(name='Полный', address='Адрес 1')
+        cls.partial = Restaurant.objects.create(name='Частичный', address='Адрес 2')
+        cls.stopped = Restaurant.objects.create(name='На стопе', address='Адрес 3')
+
+        RestaurantMenuItem.objects.create(restaurant=cls.full, product=cls.burger)
+        RestaurantMenuItem.objects.create(restaurant=cls.full, product=cls.fries)
+        # Частичный ресторан не продаёт картофель фри вовсе
+        RestaurantMenuItem.objects.create(restaurant=cls.partial, product=cls.burger)
+        RestaurantMenuItem.objects.create(restaurant=cls.stopped, product=cls.burger)
+        RestaurantMenuItem.objects.create(restaurant=cls.stopped,
+                                          product=cls.fries,
+                                          availability=False,
+                                          )
+
+        cls.orders = []
+        for products in ([cls.burger], [cls.burger, cls.fries]):
+            order = Order.objects.create(firstname='Vasya',
+                                         lastname='Petrov',
+                                         phonenumber='+79311234567',
+                                         address='Дыбенко',
+                                         payment_method='cash',
+                                         )
+            OrderProductItem.objects.bulk_create([
+                OrderProductItem(order=order,
+                                 product=product,
+                                 product_price=product.price,
+                                 quantity=1,
+                                 )
+                for product in products
+                ])
+            cls.orders.append(order)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_missing_menu_item_is_not_available(self):
+        burger_order, full_order = self.orders
+        restaurants = get_restaurants_for_orders([burger_order.id, full_order.id])
+
+        self.assertEqual(restaurants[burger_order.id],
+                         [self.stopped, self.full, self.partial],
+                         )
+        self.assertEqual(restaurants[full_order.id], [self.full])
+
+    def test_query_count_does_not_depend_on_orders(self):
+        get_restaurants_for_orders([self.orders[0].id])
+
+        # Наличие блюд берётся из закешированной матрицы
+        with self.assertNumQueries(1):
+            get_restaurants_for_orders([order.id for order in self.orders])
+
+    def test_menu_change_is_seen_by_matcher(self):
+        burger_order, full_order = self.orders
+        get_restaurants_for_orders([full_order.id])
+
+        RestaurantMenuItem.objects.create(restaurant=self.partial, product=self.fries)
+
+        self.assertEqual(get_restaurants_for_orders([full_order.id])[full_order.id],
+                         [self.full, self.partial],
+                         )
+
+
+class TestQueryPlans(TestCase):
+
+    def test_hot_queries_use_indexes(self):
+        stdout = io.StringIO()
+        call_command('check_query_plans', stdout=stdout)
+        self.assertNotIn('MISSING', stdout.getvalue())
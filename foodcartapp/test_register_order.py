@@ -2,7 +2,9 @@
 Test of register_order() 
 """
 from rest_framework.test import APIRequestFactory
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from .models import Product, ProductCategory, Order
 from .views import register_order
@@ -155,6 +157,26 @@ class TestValidationFunction(TestCase):
         self.assertEqual(response.status_code, 400)
 
 
+    def test_product_id_is_out_of_range(self):
+        """
+        Заказ с id продукта, который не помещается в первичный ключ.
+        products: Убедитесь, что это значение меньше либо равно 2147483647
+        """
+        data = {
+            "products": [{"product": 10 ** 30, "quantity": 1}],
+            "firstname": "Vasya",
+            "lastname": "Petrov",
+            "address": "Дыбенко",
+            "phonenumber": "+79311234567",
+        }
+        factory = APIRequestFactory()
+        request = factory.post(reverse('foodcartapp:register_order'), data, format='json')
+
+        response = register_order(request)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('product', response.data['products'][0])
+
+
     def test_products_keys_lack(self):
         """
         Нет ключа product в списке products.
@@ -241,7 +263,6 @@ class TestValidationFunction(TestCase):
         self.assertEqual(response.status_code, 400)
 
 
-
     def test_key_fields_lack(self):
         """
         Ключей заказа вообще нет.
@@ -351,4 +372,94 @@ class TestValidationFunction(TestCase):
         request = factory.post(reverse('foodcartapp:register_order'), data, format='json')
 
         response = register_order(request)   
-        self.assertEqual(response.status_code, 400)
\ No newline at end of file
+        self.assertEqual(response.status_code, 400)
+
+    def test_products_are_fetched_at_once(self):
+        """
+        Число запросов к БД не зависит от числа позиций в заказе.
+        """
+        products = [
+            Product.objects.create(name=f'Бургер {number}', price=100)
+            for number in range(50)
+            ]
+        factory = APIRequestFactory()
+
+        def post_order(products):
+            data = {
+                "products": [
+                    {"product": product.id, "quantity": 1} for product in products
+                    ],
+                "firstname": "Vasya",
+                "lastname": "Petrov",
+                "address": "Дыбенко",
+                "phonenumber": "+79311234567",
+            }
+            request = factory.post(reverse('foodcartapp:register_order'), data, format='json')
+            with CaptureQueriesContext(connection) as queries:
+                response = register_order(request)
+            self.assertEqual(response.status_code, 200)
+            return len(queries)
+
+        self.assertEqual(post_order(products[:2]), post_order(products))
+
+
+    def test_retry_with_idempotency_key(self):
+        """
+        Повтор запроса с тем же Idempotency-Key не создаёт второй заказ.
+        """
+        product1 = Product.objects.get(name='Бургер1')
+        data = {
+            "products": [{"product": product1.id, "quantity": 1}],
+            "firstname": "Vasya",
+            "lastname": "Petrov",
+            "address": "Дыбенко",
+            "phonenumber": "+79311234567",
+        }
+        factory = APIRequestFactory()
+
+        def post_order(data):
+            request = factory.post(reverse('foodcartapp:register_order'),
+                                   data,
+                                   format='json',
+                                   HTTP_IDEMPOTENCY_KEY='checkout-1',
+                                   )
+            return register_order(request)
+
+        response = post_order(data)
+        retry_response = post_order(data)
+
+        self.assertEqual(retry_response.status_code, 200)
+        self.assertEqual(retry_response.data, response.data)
+        self.assertEqual(Order.objects.count(), 1)
+
+        conflict_response = post_order({**data, "firstname": "Petya"})
+        self.assertEqual(conflict_response.status_code, 422)
+
+
+    def test_order_total_is_stored(self):
+        """
+        Сумма заказа сохраняется при регистрации и пересчитывается при изменении позиций.
+        """
+        product1 = Product.objects.get(name='Бургер1')
+        product2 = Product.objects.get(name='Бургер2')
+        data = {
+            "products": [
+                {"product": product1.id, "quantity": 1},
+                {"product": product2.id, "quantity": 3},
+                ],
+            "firstname": "Vasya",
+            "lastname": "Petrov",
+            "address": "Дыбенко",
+            "phonenumber": "+79311234567",
+        }
+        factory = APIRequestFactory()
+        request = factory.post(reverse('foodcartapp:register_order'), data, format='json')
+        register_order(request)
+
+        order = Order.objects.get()
+        self.assertEqual(order.total, 369 + 249 * 3)
+
+        order.items.filter(product=product2).delete()
+        order.refresh_from_db()
+        self.assertEqual(order.total, 369)
+        self.assertEqual(Order.objects.with_live_total().get().live_total, 369)
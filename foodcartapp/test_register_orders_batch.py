@@ -0,0 +1,134 @@
+"""
+Test of register_orders_batch()
+"""
+from unittest import mock
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIRequestFactory, force_authenticate
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from .models import Product, ProductCategory, Order, OrderProductItem
+from .views import OrdersBatchRateThrottle, register_order, register_orders_batch
+
+
+class TestRegisterOrdersBatch(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = ProductCategory.objects.create(name='Роллы')
+        cls.product = Product.objects.create(category=category,
+                                             name='Бургер1',
+                                             price=369
+                                             )
+        cls.partner = User.objects.create_user('partner')
+
+    def setUp(self):
+        cache.clear()
+
+    def post(self, data, partner=None, **headers):
+        factory = APIRequestFactory()
+        request = factory.post(reverse('foodcartapp:register_orders_batch'),
+                               data,
+                               format='json',
+                               **headers,
+                               )
+        force_authenticate(request, user=partner or self.partner)
+        return register_orders_batch(request)
+
+    def get_order(self, **fields):
+        return {
+            "products": [{"product": self.product.id, "quantity": 2}],
+            "firstname": "Vasya",
+            "lastname": "Petrov",
+            "address": "Дыбенко",
+            "phonenumber": "+79311234567",
+            **fields,
+        }
+
+    def test_invalid_orders_do_not_fail_batch(self):
+        data = [
+            self.get_order(),
+            self.get_order(phonenumber="+7000"),
+            self.get_order(products=[]),
+            self.get_order(firstname="Petya"),
+        ]
+
+        response = self.post(data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([order['index'] for order in response.data['created']], [0, 3])
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 2])
+        self.assertEqual(Order.objects.count(), 2)
+        self.assertEqual(OrderProductItem.objects.count(), 2)
+
+    def test_product_id_out_of_range_fails_only_its_order(self):
+        data = [
+            self.get_order(),
+            self.get_order(products=[{"product": 10 ** 30, "quantity": 1}]),
+        ]
+
+        response = self.post(data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([order['index'] for order in response.data['created']], [0])
+        self.assertEqual([error['index'] for error in response.data['errors']], [1])
+
+    def test_batch_is_not_list(self):
+        response = self.post(self.get_order())
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Order.objects.count(), 0)
+
+    def test_anonymous_batch_is_rejected(self):
+        response = self.client.post(reverse('foodcartapp:register_orders_batch'),
+                                    [self.get_order()],
+                                    content_type='application/json',
+                                    )
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(Order.objects.count(), 0)
+
+    def test_partner_token_is_accepted(self):
+        token = Token.objects.create(user=self.partner)
+
+        response = self.client.post(reverse('foodcartapp:register_orders_batch'),
+                                    [self.get_order()],
+                                    content_type='application/json',
+                                    HTTP_AUTHORIZATION=f'Token {token.key}',
+                                    )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_partner_is_throttled(self):
+        with mock.patch.object(OrdersBatchRateThrottle, 'THROTTLE_RATES', {'orders_batch': '1/min'}):
+            self.post([self.get_order()])
+            response = self.post([self.get_order()])
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_idempotency_key_is_scoped_by_endpoint_and_partner(self):
+        factory = APIRequestFactory()
+        request = factory.post(reverse('foodcartapp:register_order'),
+                               self.get_order(),
+                               format='json',
+                               HTTP_IDEMPOTENCY_KEY='order-1',
+                               )
+        self.assertEqual(register_order(request).status_code, 200)
+
+        # Тот же ключ на другом эндпоинте и у другого партнёра — новые запросы
+        response = self.post([self.get_order(), self.get_order()], HTTP_IDEMPOTENCY_KEY='order-1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['created']), 2)
+
+        other_partner = User.objects.create_user('other-partner')
+        other_response = self.post([self.get_order()],
+                                   partner=other_partner,
+                                   HTTP_IDEMPOTENCY_KEY='order-1',
+                                   )
+        self.assertEqual(len(other_response.data['created']), 1)
+        self.assertNotEqual(other_response.data, response.data)
+        self.assertEqual(Order.objects.count(), 4)
@@ -1,12 +1,22 @@
 from rest_framework.response import Response
-from rest_framework.decorators import api_view
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.decorators import api_view, authentication_classes
+from rest_framework.decorators import permission_classes, throttle_classes
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.throttling import UserRateThrottle
 
-from django.db import transaction
-from django.http import JsonResponse
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
 from django.templatetags.static import static
+from django.utils.cache import get_conditional_response
 
-from .models import Product, Order, OrderProductItem
-from .serializers import OrderSerializer
+from .catalog import get_catalog, serialize_product
+from .idempotency import idempotent
+from .models import Product
+from .orders import create_orders
+from .streaming import stream_json_response
+from .serializers import OrderSerializer, get_requested_product_ids
 
 
 def banners_list_api(request):
@@ -33,57 +43,89 @@ def banners_list_api(request):
     })
 
 
+def cached_product_list_api(request):
+    # ETag and content are taken from the same catalog version
+    etag, content = get_catalog()
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(content, content_type='application/json')
+    response['ETag'] = etag
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
 def product_list_api(request):
-    products = Product.objects.select_related('category').available()
-
-    dumped_products = []
-    for product in products:
-        dumped_product = {
-            'id': product.id,
-            'name': product.name,
-            'price': product.price,
-            'special_status': product.special_status,
-            'description': product.description,
-            'category': {
-                'id': product.category.id,
-                'name': product.category.name,
-            },
-            'image': product.image.url,
-            'restaurant': {
-                'id': product.id,
-                'name': product.name,
-            }
-        }
-        dumped_products.append(dumped_product)
-    return JsonResponse(dumped_products, safe=False, json_dumps_params={
-        'ensure_ascii': False,
-        'indent': 4,
-    })
+    if not request.GET.get('stream'):
+        return cached_product_list_api(request)
+
+    products = (
+        Product.objects
+        .select_related('category')
+        .available()
+        .order_by('pk')
+        .iterator(chunk_size=settings.STREAMING_CHUNK_SIZE)
+        )
+    return stream_json_response(products, serialize_product)
 
 
 @api_view(['POST'])
+@idempotent
 def register_order(request):
 
     serializer = OrderSerializer(data=request.data)
     serializer.is_valid(raise_exception=True) 
 
-    order_positions = serializer.validated_data
-    products = order_positions.pop('products')
-
-    with transaction.atomic():
-        order = Order.objects.create(**order_positions)
-        order_product_items = []
-        for product_item in products:
-            product = product_item['product']
-            product_quantity = product_item['quantity']
-            order_product_items.append(OrderProductItem(product=product,
-                                                        product_price=product.price,
-                                                        quantity=product_quantity,
-                                                        order=order,
-                                                        )   
-                                      )
-        OrderProductItem.objects.bulk_create(order_product_items)      
-
+    order, = create_orders([serializer.validated_data])
     serializer = OrderSerializer(order)
    
     return Response(serializer.data)
+
+
+class OrdersBatchRateThrottle(UserRateThrottle):
+    scope = 'orders_batch'
+
+
+@api_view(['POST'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated])
+@throttle_classes([OrdersBatchRateThrottle])
+@idempotent
+def register_orders_batch(request):
+    """
+    Register a list of orders at once.
+
+    Only partners with an API token may send batches, each partner is
+    limited to ORDERS_BATCH_THROTTLE_RATE batches. Invalid orders are
+    reported by their index in the list and do not prevent the valid
+    ones from being saved.
+    """
+    if not isinstance(request.data, list):
+        raise ValidationError({'non_field_errors': ['Ожидался list с заказами.']})
+    if len(request.data) > settings.ORDERS_BATCH_MAX_SIZE:
+        raise ValidationError({
+            'non_field_errors': [
+                f'В пакете не может быть больше {settings.ORDERS_BATCH_MAX_SIZE} заказов.'
+                ]
+            })
+
+    products = Product.objects.in_bulk(get_requested_product_ids(request.data))
+    valid_orders = []
+    valid_indexes = []
+    errors = []
+    for index, order_data in enumerate(request.data):
+        serializer = OrderSerializer(data=order_data, context={'products': products})
+        if serializer.is_valid():
+            valid_orders.append(serializer.validated_data)
+            valid_indexes.append(index)
+        else:
+            errors.append({'index': index, 'errors': serializer.errors})
+
+    orders = create_orders(valid_orders)
+
+    return Response({
+        'created': [
+            {'index': index, 'id': order.id}
+            for index, order in zip(valid_indexes, orders)
+            ],
+        'errors': errors,
+    })
@@ -1,3 +1,16 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import GeocodedAddress
+
+
+@admin.register(GeocodedAddress)
+class GeocodedAddressAdmin(admin.ModelAdmin):
+    list_display = [
+        'address',
+        'latitude',
+        'longitude',
+        'fetched_at',
+    ]
+    search_fields = [
+        'address',
+    ]
@@ -0,0 +1,122 @@
+from collections import Counter
+
+from django.conf import settings
+from django.db.models import Case, Count, IntegerField, Value, When
+from django.utils import timezone
+
+from foodcartapp.models import Order
+from foodcartapp.querysets import get_restaurants_for_orders
+from .spatial import get_restaurant_index
+
+
+def get_restaurants_load() -> Counter:
+    """
+    Return number of orders being delivered by each restaurant.
+    """
+    delivering_orders = (
+        Order.objects
+        .filter(status='delivering', restaurant__isnull=False)
+        .order_by()
+        .values_list('restaurant')
+        .annotate(load=Count('id'))
+        )
+    return Counter(dict(delivering_orders))
+
+
+def save_assignments(chosen_restaurants) -> set:
+    """
+    Save restaurants chosen for orders and return IDs of assigned orders.
+
+    chosen_restaurants maps order ID to restaurant ID. Orders a manager
+    has taken meanwhile are left as is. Costs two queries.
+    """
+    if not chosen_restaurants:
+        return set()
+    now = timezone.now()
+    Order.objects.filter(
+        id__in=chosen_restaurants,
+        status='unprocessed',
+        restaurant__isnull=True,
+        ).update(
+            restaurant=Case(
+                *[When(id=order_id, then=Value(restaurant_id))
+                  for order_id, restaurant_id in chosen_restaurants.items()],
+                output_field=IntegerField(),
+                ),
+            updated_at=now,
+            )
+    saved_orders = Order.objects.filter(
+        id__in=chosen_restaurants,
+        updated_at=now,
+        ).values_list('id', 'restaurant_id')
+    return {
+        order_id for order_id, restaurant_id in saved_orders
+        if chosen_restaurants[order_id] == restaurant_id
+        }
+
+
+def assign_restaurants(orders=None, batch_size=None) -> int:
+    """
+    Assign restaurants to unprocessed orders and return number of assigned ones.
+
+    Each order goes to the eligible restaurant within DELIVERY_RADIUS_KM
+    with the lowest cost: distance in km plus ASSIGNMENT_LOAD_PENALTY_KM
+    for every order the restaurant is delivering or has just been given.
+    Orders are processed in batches, each batch costs a fixed number
+    of queries. An order a manager has taken meanwhile is left as is.
+    """
+    batch_size = batch_size or settings.ASSIGNMENT_BATCH_SIZE
+    if orders is None:
+        orders = Order.objects.all()
+    orders = (
+        orders
+        .filter(status='unprocessed',
+                restaurant__isnull=True,
+                latitude__isnull=False,
+                longitude__isnull=False,
+                )
+        .only('id', 'latitude', 'longitude', 'restaurant', 'updated_at')
+        .order_by('id')
+        )
+
+    index = get_restaurant_index()
+    load = get_restaurants_load()
+    assigned_count = 0
+    last_id = 0
+    while True:
+        batch = list(orders.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            return assigned_count
+        last_id = batch[-1].id
+
+        restaurants_by_order = get_restaurants_for_orders(
+            order.id for order in batch
+            )
+        chosen_restaurants = {}
+        for order in batch:
+            restaurant_ids = {
+                restaurant.id for restaurant in restaurants_by_order[order.id]
+                }
+            nearest_restaurants = index.nearest(
+                order.latitude,
+                order.longitude,
+                radius_km=settings.DELIVERY_RADIUS_KM,
+                restaurant_ids=restaurant_ids,
+                )
+            if not nearest_restaurants:
+                continue
+            restaurant, _ = min(
+                nearest_restaurants,
+                key=lambda restaurant_distance: (
+                    restaurant_distance[1]
+                    + settings.ASSIGNMENT_LOAD_PENALTY_KM * load[restaurant_distance[0].id]
+                    ),
+                )
+            load[restaurant.id] += 1
+            chosen_restaurants[order.id] = restaurant.id
+
+        assigned_order_ids = save_assignments(chosen_restaurants)
+        for order_id, restaurant_id in chosen_restaurants.items():
+            if order_id not in assigned_order_ids:
+                load[restaurant_id] -= 1
+        assigned_count += len(assigned_order_ids)
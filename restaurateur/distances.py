@@ -0,0 +1,90 @@
+import numpy as np
+
+from .geolocation import fill_restaurants_coordinates
+
+
+EARTH_RADIUS_KM = 6371.009
+
+
+def get_distance_matrix(from_coordinates, to_coordinates) -> np.ndarray:
+    """
+    Return great-circle distances in km between two sets of points.
+
+    Points are (latitude, longitude) pairs in degrees, the result has
+    shape (len(from_coordinates), len(to_coordinates)).
+    """
+    from_coordinates = np.radians(
+        np.asarray(from_coordinates, dtype=float).reshape(-1, 2)
+        )
+    to_coordinates = np.radians(
+        np.asarray(to_coordinates, dtype=float).reshape(-1, 2)
+        )
+    from_lat = from_coordinates[:, 0, np.newaxis]
+    from_lng = from_coordinates[:, 1, np.newaxis]
+    to_lat = to_coordinates[np.newaxis, :, 0]
+    to_lng = to_coordinates[np.newaxis, :, 1]
+
+    haversine = (
+        np.sin((to_lat - from_lat) / 2) ** 2
+        + np.cos(from_lat) * np.cos(to_lat) * np.sin((to_lng - from_lng) / 2) ** 2
+        )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(haversine, 0, 1)))
+
+
+def rank_restaurants(orders, restaurants_by_order, radius_km=None) -> dict:
+    """
+    Return eligible restaurants of each order sorted by distance.
+
+    restaurants_by_order maps order ID to eligible restaurants, as returned
+    by get_restaurants_for_orders(). The result maps order ID to a dict
+    {restaurant: distance in km}. Orders and restaurants without
+    coordinates get no distances, restaurants farther than radius_km
+    are left out.
+    """
+    restaurants = {
+        restaurant.id: restaurant
+        for order_restaurants in restaurants_by_order.values()
+        for restaurant in order_restaurants
+        }
+    fill_restaurants_coordinates(restaurants.values())
+    restaurants = [
+        restaurant for restaurant in restaurants.values()
+        if restaurant.latitude is not None and restaurant.longitude is not None
+        ]
+    geocoded_orders = [
+        order for order in orders
+        if order.latitude is not None and order.longitude is not None
+        ]
+
+    distances = {order.id: {} for order in orders}
+    if not restaurants or not geocoded_orders:
+        return distances
+
+    restaurant_positions = {
+        restaurant.id: position for position, restaurant in enumerate(restaurants)
+        }
+    is_eligible = np.zeros((len(geocoded_orders), len(restaurants)), dtype=bool)
+    for row, order in enumerate(geocoded_orders):
+        positions = [
+            restaurant_positions[restaurant.id]
+            for restaurant in restaurants_by_order.get(order.id, [])
+            if restaurant.id in restaurant_positions
+            ]
+        is_eligible[row, positions] = True
+
+    distance_matrix = get_distance_matrix(
+        [(order.latitude, order.longitude) for order in geocoded_orders],
+        [(restaurant.latitude, restaurant.longitude) for restaurant in restaurants],
+        )
+    if radius_km is not None:
+        is_eligible &= distance_matrix <= radius_km
+    distance_matrix[~is_eligible] = np.inf
+    ranking = np.argsort(distance_matrix, axis=1, kind='stable')
+
+    for row, order in enumerate(geocoded_orders):
+        eligible_count = is_eligible[row].sum()
+        distances[order.id] = {
+            restaurants[position]: float(distance_matrix[row, position])
+            for position in ranking[row, :eligible_count]
+            }
+    return distances
@@ -0,0 +1,132 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from foodcartapp.models import Order
+from .geolocation import get_coordinates_batch
+from .models import GeocodingJob
+
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_orders_geocoding(orders):
+    """
+    Put orders into the geocoding queue and mark them as pending.
+
+    Orders already present in the queue are rescheduled, so the function
+    may be called again when order address changes.
+    """
+    now = timezone.now()
+    order_ids = [order.id for order in orders]
+
+    GeocodingJob.objects.filter(order__in=order_ids).update(
+        status='queued',
+        attempts=0,
+        next_attempt_at=now,
+        last_error='',
+    )
+    queued_order_ids = set(
+        GeocodingJob.objects.filter(
+            order__in=order_ids,
+            ).values_list('order_id', flat=True)
+        )
+    GeocodingJob.objects.bulk_create([
+        GeocodingJob(order_id=order_id, next_attempt_at=now)
+        for order_id in order_ids if order_id not in queued_order_ids
+        ])
+    Order.objects.filter(id__in=order_ids).update(
+        geocoding_status='pending',
+        latitude=None,
+        longitude=None,
+        updated_at=now,
+    )
+
+
+def get_retry_delay(attempts):
+    return timedelta(
+        seconds=settings.GEOCODING_RETRY_DELAY * 2 ** (attempts - 1)
+        )
+
+
+def claim_geocoding_jobs(batch_size, now):
+    """
+    Take due jobs for this worker and count the attempt right away.
+
+    Claimed jobs are postponed for GEOCODING_CLAIM_TIMEOUT seconds, so
+    other workers skip them, and a crashed worker's jobs become due again.
+    """
+    with transaction.atomic():
+        jobs = list(
+            GeocodingJob.objects
+            .select_for_update(skip_locked=True, of=('self',))
+            .select_related('order')
+            .filter(status='queued', next_attempt_at__lte=now)
+            .order_by('next_attempt_at')[:batch_size]
+            )
+        for job in jobs:
+            job.attempts += 1
+            job.next_attempt_at = now + timedelta(seconds=settings.GEOCODING_CLAIM_TIMEOUT)
+        GeocodingJob.objects.bulk_update(jobs, ['attempts', 'next_attempt_at'])
+    return jobs
+
+
+def save_geocoding_result(job, coordinates, now):
+    """
+    Store the result of a claimed job unless the job was requeued meanwhile.
+    """
+    order_fields = {'updated_at': now}
+    if isinstance(coordinates, Exception):
+        job_fields = {'last_error': str(coordinates) or repr(coordinates)}
+        if job.attempts < settings.GEOCODING_MAX_ATTEMPTS:
+            job_fields['next_attempt_at'] = now + get_retry_delay(job.attempts)
+        else:
+            job_fields['status'] = 'failed'
+            order_fields['geocoding_status'] = 'failed'
+    else:
+        job_fields = {'status': 'done', 'last_error': ''}
+        if coordinates:
+            order_fields['latitude'], order_fields['longitude'] = coordinates
+            order_fields['geocoding_status'] = 'done'
+        else:
+            order_fields['geocoding_status'] = 'not_found'
+
+    # A changed address resets attempts, the old result must not win
+    saved = GeocodingJob.objects.filter(
+        id=job.id,
+        status='queued',
+        attempts=job.attempts,
+        ).update(**job_fields)
+    if saved and 'geocoding_status' in order_fields:
+        Order.objects.filter(id=job.order_id).update(**order_fields)
+
+
+def process_geocoding_jobs(batch_size=None):
+    """
+    Geocode one batch of due jobs and return the number of processed jobs.
+
+    Jobs are claimed and their results saved in two short transactions,
+    the geocoder is queried between them without holding locks. Any error
+    is retried with exponential backoff until GEOCODING_MAX_ATTEMPTS is
+    reached. Jobs are locked with SKIP LOCKED where the database supports
+    it, so several workers may run at once.
+    """
+    batch_size = batch_size or settings.GEOCODING_BATCH_SIZE
+    jobs = claim_geocoding_jobs(batch_size, timezone.now())
+    if not jobs:
+        return 0
+
+    try:
+        batch_coordinates = get_coordinates_batch([job.order.address for job in jobs])
+    except Exception as error:
+        logger.exception('Geocoding batch failed')
+        batch_coordinates = [error] * len(jobs)
+
+    now = timezone.now()
+    with transaction.atomic():
+        for job, coordinates in zip(jobs, batch_coordinates):
+            save_geocoding_result(job, coordinates, now)
+    return len(jobs)
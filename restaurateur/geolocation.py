@@ -1,69 +1,263 @@
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
 import requests
 
 from collections import OrderedDict
-from geopy.distance import great_circle as GC
 
 from django.conf import settings
-from django.shortcuts import render
+from django.utils import timezone
 
-from foodcartapp.models import Restaurant, Order
+from foodcartapp.models import Restaurant
+from .metrics import observe_geocoder_call
+from .models import GeocodedAddress
 
 
 APIKEY = settings.YANDEX_MAPS_API_KEY
 
 
-def fetch_coordinates(address, apikey=APIKEY):
+class GeocoderError(Exception):
+    """
+    Geocoder answered with something that is not a geocoding result.
+    """
+
+
+GEOCODER_ERRORS = (requests.RequestException, GeocoderError)
+
+
+def fetch_coordinates(address, apikey=APIKEY, session=None):
+    session = session or requests
     base_url = "https://geocode-maps.yandex.ru/1.x"
-    response = requests.get(base_url, params={
-        "geocode": address,
-        "apikey": apikey,
-        "format": "json",
-    })
+    started_at = time.perf_counter()
+    try:
+        response = session.get(base_url, params={
+            "geocode": address,
+            "apikey": apikey,
+            "format": "json",
+        }, timeout=settings.GEOCODER_TIMEOUT)
+    finally:
+        observe_geocoder_call(time.perf_counter() - started_at)
     response.raise_for_status()
-    found_places = response.json()['response']['GeoObjectCollection']['featureMember']
-
-    if not found_places:
-        return None
+    try:
+        found_places = response.json()['response']['GeoObjectCollection']['featureMember']
+        if not found_places:
+            return None
 
-    most_relevant = found_places[0]
-    lon, lat = most_relevant['GeoObject']['Point']['pos'].split(" ")
+        most_relevant = found_places[0]
+        lon, lat = most_relevant['GeoObject']['Point']['pos'].split(" ")
+    except (KeyError, IndexError, TypeError, ValueError) as error:
+        raise GeocoderError(f'Malformed geocoder response: {error!r}') from error
     return lat, lon
 
 
-def get_restaurants_distances(restaurants, order) -> dict:
+class RateLimiter:
+    """
+    Spread calls evenly so that no more than `rate` calls start per second.
 
-    # FIXME объединить код для получения координат order и restaurant (ContentType?)
-     
-    if not all([order.latitude, order.longitude]):
-        if order_coords:=fetch_coordinates(order.address):
-            latitude, longitude = order_coords
-        else:
-            return {}
-        order.latitude = latitude
-        order.longitude = longitude
-        order.save()
+    Rate 0 disables limiting.
+    """
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self._next_call_at = 0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            call_at = max(now, self._next_call_at)
+            self._next_call_at = call_at + self.interval
+        time.sleep(call_at - now)
+
+
+def create_geocoder_session():
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=settings.GEOCODER_MAX_WORKERS,
+    )
+    session.mount('https://', adapter)
+    return session
+
+
+geocoder_session = create_geocoder_session()
+geocoder_rate_limiter = RateLimiter(settings.GEOCODER_RATE_LIMIT)
+
+
+def fetch_coordinates_batch(addresses, max_workers=None):
+    """
+    Geocode addresses concurrently and return results in input order.
+
+    Requests share one keep-alive session and respect GEOCODER_RATE_LIMIT.
+    A failed request yields its error, one of GEOCODER_ERRORS, instead
+    of coordinates.
+    """
+    max_workers = max_workers or settings.GEOCODER_MAX_WORKERS
+
+    def fetch(address):
+        geocoder_rate_limiter.wait()
+        try:
+            return fetch_coordinates(address, session=geocoder_session)
+        except GEOCODER_ERRORS as error:
+            return error
+
+    if len(addresses) <= 1:
+        return [fetch(address) for address in addresses]
+    # Worker threads run in copies of the caller context, so that
+    # geocoder time is accounted to the current request metrics.
+    contexts = [contextvars.copy_context() for _ in addresses]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda context, address: context.run(fetch, address),
+                                 contexts,
+                                 addresses,
+                                 ))
+
+
+class LRUCache:
+    """
+    Thread-safe in-process LRU cache.
+    """
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._items:
+                return default
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+geocode_lru = LRUCache(settings.GEOCODE_LRU_SIZE)
+
+
+def normalize_address(address):
+    return ' '.join(address.lower().split())
+
+
+def is_fresh(geocoded_address):
+    if geocoded_address.is_found:
+        ttl = settings.GEOCODE_CACHE_TTL
     else:
-        order_coords = (order.latitude, order.longitude)
-
-    restaurants_distances = {}
-    for restaurant in restaurants:
-        if not all([restaurant.latitude, restaurant.longitude]):
-            if restaurant_coordinates:=fetch_coordinates(restaurant.address):
-                latitude, longitude = restaurant_coordinates
-                restaurant.latitude = latitude
-                restaurant.longitude = longitude
-                restaurant.save()
-                restaurant_coords = (latitude, longitude)
-            else:
-                continue
-        else:
-            restaurant_coords = (restaurant.latitude, restaurant.longitude)
+        ttl = settings.GEOCODE_NEGATIVE_CACHE_TTL
+    expires_at = geocoded_address.fetched_at + timedelta(seconds=ttl)
+    return timezone.now() < expires_at
+
+
+def get_coordinates_batch(addresses):
+    """
+    Return coordinates for each address in input order.
+
+    Lookups go through the in-process LRU, then the GeocodedAddress table
+    and only then to the geocoder, which is queried concurrently. Both
+    successful and failed lookups are cached, stale entries are refreshed
+    after their TTL. Each result is (latitude, longitude), None if the
+    address was not found, or one of GEOCODER_ERRORS if the geocoder failed
+    and no stale coordinates are known.
+    """
+    keys = [normalize_address(address) for address in addresses]
+    geocoded_addresses = {}
+    for key in keys:
+        geocoded_address = geocode_lru.get(key)
+        if geocoded_address is not None and is_fresh(geocoded_address):
+            geocoded_addresses[key] = geocoded_address
 
-        distance = GC(order_coords, restaurant_coords).km
-        restaurants_distances[restaurant] = distance
+    missing_keys = set(keys) - set(geocoded_addresses)
+    if missing_keys:
+        geocoded_addresses.update(
+            GeocodedAddress.objects.in_bulk(missing_keys, field_name='address')
+            )
 
-    restaurants_distances_ordered = dict(
-        sorted(restaurants_distances.items(), key=lambda x: x[1])
+    addresses_to_fetch = {}
+    for address, key in zip(addresses, keys):
+        geocoded_address = geocoded_addresses.get(key)
+        if geocoded_address is None or not is_fresh(geocoded_address):
+            addresses_to_fetch.setdefault(key, address)
+
+    fetched_coordinates = fetch_coordinates_batch(list(addresses_to_fetch.values()))
+    errors = {}
+    created, updated = [], []
+    fetched_at = timezone.now()
+    for key, coordinates in zip(addresses_to_fetch, fetched_coordinates):
+        if isinstance(coordinates, GEOCODER_ERRORS):
+            errors[key] = coordinates
+            continue
+        latitude, longitude = map(float, coordinates) if coordinates else (None, None)
+        geocoded_address = geocoded_addresses.get(key)
+        if geocoded_address is None:
+            geocoded_address = GeocodedAddress(address=key)
+            created.append(geocoded_address)
+        else:
+            updated.append(geocoded_address)
+        geocoded_address.latitude = latitude
+        geocoded_address.longitude = longitude
+        geocoded_address.fetched_at = fetched_at
+        geocoded_addresses[key] = geocoded_address
+
+    GeocodedAddress.objects.bulk_create(created, ignore_conflicts=True)
+    GeocodedAddress.objects.bulk_update(
+        updated, ['latitude', 'longitude', 'fetched_at'],
         )
 
-    return restaurants_distances_ordered
+    results = []
+    for key in keys:
+        geocoded_address = geocoded_addresses.get(key)
+        if geocoded_address is None:
+            results.append(errors[key])
+            continue
+        if key not in errors:
+            geocode_lru.set(key, geocoded_address)
+        results.append(geocoded_address.coordinates)
+    return results
+
+
+def get_coordinates(address):
+    """
+    Return (latitude, longitude) of address or None if it was not found.
+
+    See get_coordinates_batch() for caching rules.
+    """
+    coordinates, = get_coordinates_batch([address])
+    if isinstance(coordinates, GEOCODER_ERRORS):
+        raise coordinates
+    return coordinates
+
+
+def fill_restaurants_coordinates(restaurants):
+    """
+    Geocode restaurants without coordinates and save found coordinates.
+    """
+    restaurants = [
+        restaurant for restaurant in restaurants
+        if restaurant.latitude is None or restaurant.longitude is None
+        ]
+    if not restaurants:
+        return
+
+    batch_coordinates = get_coordinates_batch(
+        [restaurant.address for restaurant in restaurants]
+        )
+    geocoded_restaurants = []
+    for restaurant, coordinates in zip(restaurants, batch_coordinates):
+        if not coordinates or isinstance(coordinates, GEOCODER_ERRORS):
+            continue
+        restaurant.latitude, restaurant.longitude = coordinates
+        geocoded_restaurants.append(restaurant)
+    Restaurant.objects.bulk_update(geocoded_restaurants, ['latitude', 'longitude'])
@@ -0,0 +1,29 @@
+from datetime import datetime
+
+from django.db.models import Q
+
+
+def encode_cursor(moment, object_id):
+    return f'{moment.isoformat()}_{object_id}'
+
+
+def decode_cursor(cursor):
+    """
+    Return (datetime, id) encoded by encode_cursor() or None if malformed.
+    """
+    try:
+        moment, object_id = cursor.rsplit('_', 1)
+        return datetime.fromisoformat(moment), int(object_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def filter_after(queryset, field_name, cursor):
+    """
+    Keep objects following the cursor in (field_name, id) order.
+    """
+    moment, object_id = cursor
+    return queryset.filter(
+        Q(**{f'{field_name}__gt': moment})
+        | Q(**{field_name: moment, 'id__gt': object_id})
+        )
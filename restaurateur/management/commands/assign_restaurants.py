@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from restaurateur.assignment import assign_restaurants
+
+
+class Command(BaseCommand):
+    help = 'Assign nearest eligible restaurants to unprocessed orders'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.ASSIGNMENT_BATCH_SIZE,
+            help='Number of orders assigned per batch',
+        )
+
+    def handle(self, *args, **options):
+        assigned_count = assign_restaurants(batch_size=options['batch_size'])
+        self.stdout.write(f'Orders assigned: {assigned_count}')
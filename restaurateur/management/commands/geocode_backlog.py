@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from foodcartapp.models import Restaurant, Order
+from restaurateur.geolocation import GEOCODER_ERRORS, get_coordinates_batch
+from restaurateur.models import GeocodingJob
+
+
+class Command(BaseCommand):
+    help = 'Fill missing coordinates of restaurants and orders'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Number of addresses geocoded concurrently',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        restaurants = Restaurant.objects.order_by('id')
+        geocoded, total = self.geocode(restaurants, batch_size, ['latitude', 'longitude'])
+        self.stdout.write(f'Restaurants geocoded: {geocoded} of {total}')
+
+        orders = Order.objects.only('id', 'address').order_by('id')
+        geocoded, total = self.geocode(
+            orders,
+            batch_size,
+            ['latitude', 'longitude', 'geocoding_status', 'updated_at'],
+            )
+        self.stdout.write(f'Orders geocoded: {geocoded} of {total}')
+
+    def geocode(self, queryset, batch_size, fields):
+        queryset = queryset.filter(Q(latitude__isnull=True) | Q(longitude__isnull=True))
+        geocoded = total = 0
+        last_id = 0
+        while True:
+            objects = list(queryset.filter(id__gt=last_id)[:batch_size])
+            if not objects:
+                return geocoded, total
+            last_id = objects[-1].id
+            total += len(objects)
+
+            batch_coordinates = get_coordinates_batch(
+                [obj.address for obj in objects]
+                )
+            now = timezone.now()
+            processed = []
+            for obj, coordinates in zip(objects, batch_coordinates):
+                if isinstance(coordinates, GEOCODER_ERRORS):
+                    self.stderr.write(f'{obj.address}: {coordinates}')
+                    continue
+                processed.append(obj)
+                if coordinates:
+                    obj.latitude, obj.longitude = coordinates
+                    geocoded += 1
+                if isinstance(obj, Order):
+                    obj.geocoding_status = 'done' if coordinates else 'not_found'
+                    obj.updated_at = now
+            queryset.model.objects.bulk_update(processed, fields)
+
+            if queryset.model is Order:
+                GeocodingJob.objects.filter(
+                    order__in=processed,
+                    status='queued',
+                    ).update(status='done')
@@ -0,0 +1,53 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from foodcartapp.models import Order
+from restaurateur.geocoding_jobs import enqueue_orders_geocoding
+from restaurateur.geocoding_jobs import process_geocoding_jobs
+
+
+class Command(BaseCommand):
+    help = 'Geocode order addresses queued at order registration'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.GEOCODING_BATCH_SIZE,
+            help='Number of jobs processed in one transaction',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=settings.GEOCODING_POLL_INTERVAL,
+            help='Seconds to sleep when the queue is empty',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit when the queue is empty instead of polling it',
+        )
+        parser.add_argument(
+            '--enqueue-missing',
+            action='store_true',
+            help='Queue pending orders that have no geocoding job yet',
+        )
+
+    def handle(self, *args, **options):
+        if options['enqueue_missing']:
+            orders = Order.objects.filter(
+                geocoding_status='pending',
+                geocoding_job__isnull=True,
+                ).only('id')
+            enqueue_orders_geocoding(orders)
+
+        while True:
+            processed = process_geocoding_jobs(options['batch_size'])
+            if processed:
+                self.stdout.write(f'Processed {processed} geocoding jobs')
+                continue
+            if options['once']:
+                break
+            time.sleep(options['poll_interval'])
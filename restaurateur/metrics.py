@@ -0,0 +1,181 @@
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+
+from django.db import connection
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# Any other method a client sends is counted as 'other', so clients
+# cannot grow the number of series
+HTTP_METHODS = frozenset(['GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'])
+
+request_stats = contextvars.ContextVar('request_stats', default=None)
+
+
+class Histogram:
+    """
+    Cumulative histogram in the Prometheus sense.
+    """
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def get_cumulative_counts(self):
+        total = 0
+        for bucket, count in zip([*self.buckets, '+Inf'], self.counts):
+            total += count
+            yield bucket, total
+
+
+class MetricsRegistry:
+    """
+    Thread-safe in-process histograms labelled by view.
+
+    Every worker process keeps its own numbers, which are lost on restart.
+    """
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def describe(self, name, description, buckets):
+        self.metrics[name] = (description, buckets, {})
+
+    def observe(self, name, value, **labels):
+        _, buckets, histograms = self.metrics[name]
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            histogram = histograms.get(key)
+            if histogram is None:
+                histogram = histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def clear(self):
+        with self.lock:
+            for _, _, histograms in self.metrics.values():
+                histograms.clear()
+
+    def render(self) -> str:
+        """
+        Return all histograms in the Prometheus text exposition format.
+        """
+        lines = []
+        with self.lock:
+            for name, (description, _, histograms) in self.metrics.items():
+                lines.append(f'# HELP {name} {description}')
+                lines.append(f'# TYPE {name} histogram')
+                for labels, histogram in sorted(histograms.items()):
+                    for bucket, count in histogram.get_cumulative_counts():
+                        bucket_labels = format_labels([*labels, ('le', bucket)])
+                        lines.append(f'{name}_bucket{bucket_labels} {count}')
+                    lines.append(f'{name}_sum{format_labels(labels)} {histogram.sum}')
+                    lines.append(f'{name}_count{format_labels(labels)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    escaped_labels = ','.join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'),
+        )
+        for name, value in labels
+    )
+    return f'{{{escaped_labels}}}'
+
+
+registry = MetricsRegistry()
+registry.describe('starburger_request_duration_seconds',
+                  'Request latency by view.',
+                  LATENCY_BUCKETS,
+                  )
+registry.describe('starburger_request_sql_queries',
+                  'SQL queries per request by view.',
+                  QUERY_COUNT_BUCKETS,
+                  )
+registry.describe('starburger_request_sql_duration_seconds',
+                  'SQL time per request by view.',
+                  LATENCY_BUCKETS,
+                  )
+registry.describe('starburger_request_geocoder_duration_seconds',
+                  'Geocoder HTTP time per request by view.',
+                  LATENCY_BUCKETS,
+                  )
+registry.describe('starburger_geocoder_call_duration_seconds',
+                  'Latency of single geocoder HTTP calls.',
+                  LATENCY_BUCKETS,
+                  )
+
+
+class RequestStats:
+
+    def __init__(self):
+        self.sql_queries = 0
+        self.sql_duration = 0
+        self.geocoder_duration = 0
+        self.lock = threading.Lock()
+
+    def record_sql(self, execute, sql, params, many, context):
+        started_at = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            with self.lock:
+                self.sql_queries += 1
+                self.sql_duration += time.perf_counter() - started_at
+
+
+def observe_geocoder_call(duration):
+    """
+    Account a geocoder HTTP call to the current request, if any.
+    """
+    registry.observe('starburger_geocoder_call_duration_seconds', duration)
+    stats = request_stats.get()
+    if stats is not None:
+        with stats.lock:
+            stats.geocoder_duration += duration
+
+
+class MetricsMiddleware:
+    """
+    Record latency, SQL queries and geocoder time of every request.
+
+    Streaming responses are measured until the response is returned,
+    not until the stream is consumed.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = RequestStats()
+        token = request_stats.set(stats)
+        started_at = time.perf_counter()
+        try:
+            with connection.execute_wrapper(stats.record_sql):
+                response = self.get_response(request)
+        finally:
+            request_stats.reset(token)
+        duration = time.perf_counter() - started_at
+
+        resolver_match = getattr(request, 'resolver_match', None)
+        view = resolver_match.view_name if resolver_match else 'unmatched'
+        method = request.method if request.method in HTTP_METHODS else 'other'
+        registry.observe('starburger_request_duration_seconds', duration,
+                         view=view, method=method)
+        registry.observe('starburger_request_sql_queries', stats.sql_queries, view=view)
+        registry.observe('starburger_request_sql_duration_seconds', stats.sql_duration, view=view)
+        registry.observe('starburger_request_geocoder_duration_seconds', stats.geocoder_duration,
+                         view=view)
+        return response
@@ -0,0 +1,28 @@
+# Generated by Django 3.2 on 2026-10-18 18:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocodedAddress',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('address', models.CharField(max_length=255, unique=True, verbose_name='нормализованный адрес')),
+                ('latitude', models.FloatField(blank=True, null=True, verbose_name='широта')),
+                ('longitude', models.FloatField(blank=True, null=True, verbose_name='долгота')),
+                ('fetched_at', models.DateTimeField(db_index=True, verbose_name='время запроса к геокодеру')),
+            ],
+            options={
+                'verbose_name': 'координаты адреса',
+                'verbose_name_plural': 'координаты адресов',
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 3.2 on 2026-10-18 18:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0057_order_geocoding_status'),
+        ('restaurateur', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocodingJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('queued', 'в очереди'), ('done', 'выполнено'), ('failed', 'не выполнено')], default='queued', max_length=32, verbose_name='статус')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='число попыток')),
+                ('next_attempt_at', models.DateTimeField(verbose_name='время следующей попытки')),
+                ('last_error', models.TextField(blank=True, verbose_name='последняя ошибка')),
+                ('order', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='geocoding_job', to='foodcartapp.order', verbose_name='заказ')),
+            ],
+            options={
+                'verbose_name': 'задача геокодирования',
+                'verbose_name_plural': 'задачи геокодирования',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='geocodingjob',
+            index=models.Index(fields=['status', 'next_attempt_at'], name='restaurateu_status_59c8b2_idx'),
+        ),
+    ]
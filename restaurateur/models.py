@@ -1,3 +1,83 @@
 from django.db import models
 
-# Create your models here.
+
+class GeocodedAddress(models.Model):
+    address = models.CharField(
+        'нормализованный адрес',
+        max_length=255,
+        unique=True,
+    )
+    latitude = models.FloatField(
+        'широта',
+        null=True,
+        blank=True,
+    )
+    longitude = models.FloatField(
+        'долгота',
+        null=True,
+        blank=True,
+    )
+    fetched_at = models.DateTimeField(
+        'время запроса к геокодеру',
+        db_index=True,
+    )
+
+    class Meta:
+        verbose_name = 'координаты адреса'
+        verbose_name_plural = 'координаты адресов'
+
+    @property
+    def is_found(self):
+        return self.latitude is not None and self.longitude is not None
+
+    @property
+    def coordinates(self):
+        if not self.is_found:
+            return None
+        return self.latitude, self.longitude
+
+    def __str__(self):
+        return self.address
+
+
+class GeocodingJob(models.Model):
+
+    STATUSES = [
+        ('queued', 'в очереди'),
+        ('done', 'выполнено'),
+        ('failed', 'не выполнено'),
+    ]
+
+    order = models.OneToOneField(
+        'foodcartapp.Order',
+        related_name='geocoding_job',
+        verbose_name='заказ',
+        on_delete=models.CASCADE,
+    )
+    status = models.CharField(
+        'статус',
+        max_length=32,
+        choices=STATUSES,
+        default='queued',
+    )
+    attempts = models.PositiveSmallIntegerField(
+        'число попыток',
+        default=0,
+    )
+    next_attempt_at = models.DateTimeField(
+        'время следующей попытки',
+    )
+    last_error = models.TextField(
+        'последняя ошибка',
+        blank=True,
+    )
+
+    class Meta:
+        verbose_name = 'задача геокодирования'
+        verbose_name_plural = 'задачи геокодирования'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f'{self.order_id} - {self.get_status_display()}'
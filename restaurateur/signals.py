@@ -0,0 +1,11 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from foodcartapp.models import Restaurant
+from .spatial import invalidate_restaurant_index
+
+
+@receiver(post_save, sender=Restaurant)
+@receiver(post_delete, sender=Restaurant)
+def drop_restaurant_index(sender, **kwargs):
+    invalidate_restaurant_index()
@@ -0,0 +1,135 @@
+import math
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from django.conf import settings
+
+from foodcartapp.models import Restaurant
+from .distances import EARTH_RADIUS_KM, get_distance_matrix
+from .geolocation import fill_restaurants_coordinates
+
+
+class RestaurantIndex:
+    """
+    Grid index of restaurants over latitude and longitude.
+
+    Restaurants are put into square cells of `cell_size` degrees, a radius
+    query inspects only cells intersecting the bounding box of the circle.
+    """
+    def __init__(self, restaurants, cell_size):
+        self.cell_size = cell_size
+        self.lng_cells_count = math.ceil(360 / cell_size)
+        self.restaurants = [
+            restaurant for restaurant in restaurants
+            if restaurant.latitude is not None and restaurant.longitude is not None
+            ]
+        self.coordinates = np.array(
+            [(restaurant.latitude, restaurant.longitude) for restaurant in self.restaurants],
+            dtype=float,
+            ).reshape(-1, 2)
+
+        self.cells = defaultdict(list)
+        for position, (latitude, longitude) in enumerate(self.coordinates):
+            self.cells[self.get_cell(latitude, longitude)].append(position)
+
+    def get_cell(self, latitude, longitude):
+        row = math.floor((latitude + 90) / self.cell_size)
+        column = math.floor((longitude + 180) / self.cell_size) % self.lng_cells_count
+        return row, column
+
+    def get_candidates(self, latitude, longitude, radius_km):
+        if radius_km is None:
+            return range(len(self.restaurants))
+
+        lat_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+        max_latitude = min(abs(latitude) + lat_delta, 90)
+        lng_delta = lat_delta / max(math.cos(math.radians(max_latitude)), 1e-9)
+        if lng_delta >= 180:
+            return range(len(self.restaurants))
+
+        min_row, min_column = self.get_cell(latitude - lat_delta, longitude - lng_delta)
+        max_row, max_column = self.get_cell(latitude + lat_delta, longitude + lng_delta)
+        columns_count = (max_column - min_column) % self.lng_cells_count + 1
+        rows = range(min_row, max_row + 1)
+        if len(rows) * columns_count > len(self.cells):
+            cells = (
+                cell for cell in self.cells
+                if cell[0] in rows
+                and (cell[1] - min_column) % self.lng_cells_count < columns_count
+                )
+        else:
+            cells = (
+                (row, (min_column + offset) % self.lng_cells_count)
+                for row in rows for offset in range(columns_count)
+                )
+        return [position for cell in cells for position in self.cells.get(cell, [])]
+
+    def nearest(self, latitude, longitude, radius_km=None, limit=None,
+                restaurant_ids=None) -> list:
+        """
+        Return [(restaurant, distance in km)] sorted by distance.
+
+        Only restaurants within radius_km and, if given, with IDs from
+        restaurant_ids are returned, at most `limit` of them.
+        """
+        positions = self.get_candidates(latitude, longitude, radius_km)
+        if restaurant_ids is not None:
+            positions = [
+                position for position in positions
+                if self.restaurants[position].id in restaurant_ids
+                ]
+        if not len(positions):
+            return []
+
+        positions = np.asarray(positions)
+        distances = get_distance_matrix(
+            (latitude, longitude),
+            self.coordinates[positions],
+            )[0]
+        if radius_km is not None:
+            is_near = distances <= radius_km
+            positions, distances = positions[is_near], distances[is_near]
+        ranking = np.argsort(distances, kind='stable')[:limit]
+        return [
+            (self.restaurants[positions[rank]], float(distances[rank]))
+            for rank in ranking
+            ]
+
+
+_restaurant_index = None
+_restaurant_index_built_at = 0
+_restaurant_index_lock = threading.Lock()
+
+
+def get_restaurant_index() -> RestaurantIndex:
+    """
+    Return the index of all restaurants, building it on first use.
+
+    The index is dropped on restaurant changes made in this process and
+    is rebuilt after RESTAURANT_INDEX_TTL seconds to catch up with
+    changes made by other processes.
+    """
+    global _restaurant_index, _restaurant_index_built_at
+
+    with _restaurant_index_lock:
+        is_expired = time.monotonic() - _restaurant_index_built_at > settings.RESTAURANT_INDEX_TTL
+        if _restaurant_index is None or is_expired:
+            restaurants = list(Restaurant.objects.order_by('name'))
+            fill_restaurants_coordinates(restaurants)
+            _restaurant_index = RestaurantIndex(
+                restaurants,
+                settings.RESTAURANT_INDEX_CELL_SIZE,
+                )
+            _restaurant_index_built_at = time.monotonic()
+        return _restaurant_index
+
+
+def invalidate_restaurant_index():
+    global _restaurant_index
+
+    with _restaurant_index_lock:
+        _restaurant_index = None
+
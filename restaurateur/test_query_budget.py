@@ -0,0 +1,137 @@
+"""
+Test that hot views cost the same number of queries on any data volume
+
+Set QUERY_BUDGET_BASELINE to a file path to save query counts and timings
+of the views, then compare two such files with
+benchmarks/compare_baselines.py.
+"""
+import json
+import os
+import time
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from foodcartapp.models import Order, OrderProductItem
+from foodcartapp.models import Product, ProductCategory, Restaurant, RestaurantMenuItem
+from restaurateur.spatial import invalidate_restaurant_index
+
+
+HOT_VIEWS = {
+    'view_orders': '/manager/orders/',
+    'view_products': '/manager/products/',
+    'product_list_api': '/api/products/',
+    'product_list_api_stream': '/api/products/?stream=1',
+}
+
+
+def seed(restaurants_count, products_count, orders_count):
+    """
+    Add restaurants with a full menu, products and orders of two products.
+    """
+    category, _ = ProductCategory.objects.get_or_create(name='Бургеры')
+    first_number = Restaurant.objects.count()
+    Restaurant.objects.bulk_create([
+        Restaurant(name=f'Ресторан {number}',
+                   address=f'Адрес {number}',
+                   latitude=59.9 + number / 1000,
+                   longitude=30.3,
+                   )
+        for number in range(first_number, first_number + restaurants_count)
+    ])
+    first_number = Product.objects.count()
+    Product.objects.bulk_create([
+        Product(category=category,
+                name=f'Бургер {number}',
+                price=100 + number,
+                image='burger.jpg',
+                )
+        for number in range(first_number, first_number + products_count)
+    ])
+    # PKs are not returned by bulk_create on every database
+    restaurants = list(Restaurant.objects.all())
+    products = list(Product.objects.all())
+    RestaurantMenuItem.objects.filter(restaurant__in=restaurants).delete()
+    RestaurantMenuItem.objects.bulk_create([
+        RestaurantMenuItem(restaurant=restaurant, product=product)
+        for restaurant in restaurants
+        for product in products
+    ])
+    Product.objects.refresh_availability()
+
+    for number in range(orders_count):
+        order = Order.objects.create(firstname='Vasya',
+                                     lastname='Petrov',
+                                     phonenumber='+79311234567',
+                                     address=f'Дыбенко, {number}',
+                                     payment_method='cash',
+                                     latitude=59.9,
+                                     longitude=30.3,
+                                     geocoding_status='done',
+                                     )
+        OrderProductItem.objects.bulk_create([
+            OrderProductItem(order=order,
+                             product=product,
+                             product_price=product.price,
+                             quantity=1,
+                             )
+            for product in products[number % len(products):][:2]
+        ])
+    invalidate_restaurant_index()
+
+
+class TestQueryBudget(TestCase):
+
+    baselines = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user('manager', is_staff=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        baseline_path = os.environ.get('QUERY_BUDGET_BASELINE')
+        if baseline_path and cls.baselines:
+            with open(baseline_path, 'w') as baseline_file:
+                json.dump(cls.baselines, baseline_file, indent=2, sort_keys=True)
+
+    def setUp(self):
+        self.client.force_login(self.manager)
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def measure(self, url, repeat=3):
+        timings = []
+        for _ in range(repeat):
+            cache.clear()
+            started_at = time.perf_counter()
+            response = self.client.get(url)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            timings.append(time.perf_counter() - started_at)
+        return min(timings)
+
+    def test_query_count_does_not_grow_with_data(self):
+        seed(restaurants_count=2, products_count=2, orders_count=2)
+        small_counts = {view: self.count_queries(url) for view, url in HOT_VIEWS.items()}
+
+        seed(restaurants_count=20, products_count=30, orders_count=40)
+        for view, url in HOT_VIEWS.items():
+            with self.subTest(view=view):
+                queries_count = self.count_queries(url)
+                self.assertEqual(queries_count, small_counts[view])
+                self.baselines[view] = {
+                    'queries': queries_count,
+                    'seconds': self.measure(url),
+                }
@@ -1,3 +1,464 @@
-from django.test import TestCase
+"""
+Test of geocoder cache, geocoding worker, distances, restaurant index,
+restaurant assignment, orders board, orders export and metrics
+"""
+import json
+import random
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+import requests
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from geopy.distance import great_circle
+
+from foodcartapp.models import Order, OrderProductItem
+from foodcartapp.models import Product, Restaurant, RestaurantMenuItem
+from foodcartapp.querysets import get_restaurants_for_orders
+from .assignment import assign_restaurants
+from .distances import get_distance_matrix, rank_restaurants
+from .geocoding_jobs import enqueue_orders_geocoding, process_geocoding_jobs
+from .geolocation import get_coordinates, get_coordinates_batch, geocode_lru
+from .metrics import registry
+from .models import GeocodedAddress, GeocodingJob
+from .spatial import RestaurantIndex
+
+
+@mock.patch('restaurateur.geolocation.fetch_coordinates')
+class TestGeocoderCache(TestCase):
+
+    def setUp(self):
+        geocode_lru.clear()
+
+    def test_address_is_geocoded_once(self, fetch_coordinates):
+        fetch_coordinates.return_value = ('59.9', '30.4')
+
+        self.assertEqual(get_coordinates('Дыбенко, 1'), (59.9, 30.4))
+        geocode_lru.clear()
+        self.assertEqual(get_coordinates('  дыбенко,   1 '), (59.9, 30.4))
+
+        fetch_coordinates.assert_called_once()
+
+    def test_lru_hit_does_not_touch_db(self, fetch_coordinates):
+        fetch_coordinates.return_value = ('59.9', '30.4')
+        get_coordinates('Дыбенко, 1')
+
+        with self.assertNumQueries(0):
+            get_coordinates('Дыбенко, 1')
+
+    def test_not_found_address_is_cached(self, fetch_coordinates):
+        fetch_coordinates.return_value = None
+
+        self.assertIsNone(get_coordinates('Нигде'))
+        self.assertIsNone(get_coordinates('Нигде'))
+
+        fetch_coordinates.assert_called_once()
+
+    def test_stale_entry_is_refreshed(self, fetch_coordinates):
+        fetch_coordinates.return_value = None
+        get_coordinates('Дыбенко, 1')
+        GeocodedAddress.objects.update(
+            fetched_at=GeocodedAddress.objects.get().fetched_at - timedelta(days=365)
+        )
+        geocode_lru.clear()
+
+        fetch_coordinates.return_value = ('59.9', '30.4')
+        self.assertEqual(get_coordinates('Дыбенко, 1'), (59.9, 30.4))
+        self.assertEqual(fetch_coordinates.call_count, 2)
+
+    def test_batch_keeps_input_order(self, fetch_coordinates):
+        fetch_coordinates.side_effect = lambda address, **kwargs: {
+            'Дыбенко, 1': ('59.9', '30.4'),
+            'Невский, 1': ('59.9', '30.3'),
+        }.get(address)
+
+        coordinates = get_coordinates_batch(
+            ['Невский, 1', 'Нигде', 'Дыбенко, 1', 'Невский, 1']
+        )
+
+        self.assertEqual(coordinates,
+                         [(59.9, 30.3), None, (59.9, 30.4), (59.9, 30.3)],
+                         )
+        self.assertEqual(fetch_coordinates.call_count, 3)
+
+
+@mock.patch('restaurateur.geolocation.fetch_coordinates')
+class TestGeocodingWorker(TestCase):
+
+    def setUp(self):
+        geocode_lru.clear()
+        self.order = Order.objects.create(firstname='Vasya',
+                                          lastname='Petrov',
+                                          phonenumber='+79311234567',
+                                          address='Дыбенко, 1',
+                                          payment_method='cash',
+                                          )
+        enqueue_orders_geocoding([self.order])
+
+    def test_order_is_geocoded(self, fetch_coordinates):
+        fetch_coordinates.return_value = ('59.9', '30.4')
+
+        self.assertEqual(process_geocoding_jobs(), 1)
+
+        order = Order.objects.get(id=self.order.id)
+        self.assertEqual(order.geocoding_status, 'done')
+        self.assertEqual((order.latitude, order.longitude), (59.9, 30.4))
+        self.assertEqual(GeocodingJob.objects.get().status, 'done')
+
+    def test_network_error_is_retried_later(self, fetch_coordinates):
+        fetch_coordinates.side_effect = requests.ConnectionError('timeout')
+
+        self.assertEqual(process_geocoding_jobs(), 1)
+        self.assertEqual(process_geocoding_jobs(), 0)
+
+        job = GeocodingJob.objects.get()
+        self.assertEqual((job.status, job.attempts), ('queued', 1))
+        order = Order.objects.get(id=self.order.id)
+        self.assertEqual(order.geocoding_status, 'pending')
+
+    def test_unexpected_error_is_retried_later(self, fetch_coordinates):
+        fetch_coordinates.side_effect = KeyError('response')
+
+        with self.assertLogs('restaurateur.geocoding_jobs', 'ERROR'):
+            self.assertEqual(process_geocoding_jobs(), 1)
+
+        job = GeocodingJob.objects.get()
+        self.assertEqual((job.status, job.attempts), ('queued', 1))
+        self.assertIn('response', job.last_error)
+
+    def test_geocoder_is_called_outside_transaction(self, fetch_coordinates):
+        # TestCase сам открывает транзакцию, поэтому считаем вложенные
+        atomic_depth = len(connection.savepoint_ids)
+
+        def fetch(address, **kwargs):
+            self.assertEqual(len(connection.savepoint_ids), atomic_depth)
+            return ('59.9', '30.4')
+        fetch_coordinates.side_effect = fetch
+
+        self.assertEqual(process_geocoding_jobs(), 1)
+        fetch_coordinates.assert_called_once()
+
+    def test_requeued_job_result_is_dropped(self, fetch_coordinates):
+        def fetch(address, **kwargs):
+            enqueue_orders_geocoding([self.order])
+            return ('59.9', '30.4')
+        fetch_coordinates.side_effect = fetch
+
+        process_geocoding_jobs()
+
+        job = GeocodingJob.objects.get()
+        self.assertEqual((job.status, job.attempts), ('queued', 0))
+        self.assertEqual(Order.objects.get(id=self.order.id).geocoding_status, 'pending')
+
+
+class TestDistanceMatrix(SimpleTestCase):
+
+    def test_matches_geopy(self):
+        orders = [(59.94, 30.31), (55.75, 37.62)]
+        restaurants = [(59.93, 30.36), (59.84, 30.25), (56.84, 60.61)]
+
+        distances = get_distance_matrix(orders, restaurants)
+
+        for row, order in enumerate(orders):
+            for column, restaurant in enumerate(restaurants):
+                self.assertAlmostEqual(distances[row, column],
+                                       great_circle(order, restaurant).km,
+                                       places=6,
+                                       )
+
+    def test_radius_filters_ranking(self):
+        order = SimpleNamespace(id=1, latitude=59.94, longitude=30.31)
+        near = Restaurant(id=1, latitude=59.93, longitude=30.36)
+        far = Restaurant(id=2, latitude=56.84, longitude=60.61)
+
+        distances = rank_restaurants([order], {order.id: [far, near]}, radius_km=50)
+
+        self.assertEqual(list(distances[order.id]), [near])
+
+
+class TestRestaurantIndex(SimpleTestCase):
+
+    def setUp(self):
+        random.seed(1)
+        self.restaurants = [
+            SimpleNamespace(id=restaurant_id,
+                            latitude=random.uniform(59.5, 60.5),
+                            longitude=random.uniform(29.5, 31),
+                            )
+            for restaurant_id in range(300)
+        ]
+        self.index = RestaurantIndex(self.restaurants, cell_size=0.05)
+
+    def test_matches_brute_force(self):
+        latitude, longitude = 59.94, 30.31
+        restaurant_ids = set(range(0, 300, 3))
+        distances = get_distance_matrix(
+            (latitude, longitude),
+            [(r.latitude, r.longitude) for r in self.restaurants],
+        )[0]
+        expected = sorted(
+            (distance, restaurant.id)
+            for restaurant, distance in zip(self.restaurants, distances)
+            if distance <= 15 and restaurant.id in restaurant_ids
+        )[:5]
+
+        nearest = self.index.nearest(latitude, longitude,
+                                     radius_km=15,
+                                     limit=5,
+                                     restaurant_ids=restaurant_ids,
+                                     )
+
+        self.assertEqual([restaurant.id for restaurant, _ in nearest],
+                         [restaurant_id for _, restaurant_id in expected],
+                         )
+
+    def test_radius_query_skips_far_cells(self):
+        candidates = self.index.get_candidates(59.94, 30.31, radius_km=2)
+        self.assertLess(len(candidates), len(self.restaurants) / 10)
+
+
+class TestRestaurantAssignment(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        product = Product.objects.create(name='Бургер', price=369)
+        cls.near = Restaurant.objects.create(name='Рядом',
+                                             address='Адрес 1',
+                                             latitude=59.94,
+                                             longitude=30.31,
+                                             )
+        cls.far = Restaurant.objects.create(name='Далеко',
+                                            address='Адрес 2',
+                                            latitude=59.96,
+                                            longitude=30.31,
+                                            )
+        for restaurant in (cls.near, cls.far):
+            RestaurantMenuItem.objects.create(restaurant=restaurant, product=product)
+
+        for status in ('delivering', 'delivering', 'unprocessed', 'unprocessed'):
+            order = Order.objects.create(firstname='Vasya',
+                                         lastname='Petrov',
+                                         phonenumber='+79311234567',
+                                         address='Дыбенко',
+                                         payment_method='cash',
+                                         status=status,
+                                         latitude=59.94,
+                                         longitude=30.31,
+                                         restaurant=cls.near if status == 'delivering' else None,
+                                         )
+            OrderProductItem.objects.create(order=order,
+                                            product=product,
+                                            product_price=product.price,
+                                            quantity=1,
+                                            )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_busy_restaurant_is_skipped(self):
+        self.assertEqual(assign_restaurants(), 2)
+
+        assigned_restaurants = Order.objects.filter(
+            status='unprocessed',
+        ).order_by('id').values_list('restaurant', flat=True)
+        # Ближний ресторан везёт два заказа, штраф 4 км дороже 2,2 км до дальнего.
+        # Получив заказ, дальний ресторан становится дороже ближнего.
+        self.assertEqual(list(assigned_restaurants), [self.far.id, self.near.id])
+
+    def test_order_taken_meanwhile_is_kept(self):
+        taken_order = Order.objects.filter(status='unprocessed').order_by('id').first()
+
+        def take_order(order_ids):
+            # Менеджер успел вручную выбрать ресторан, пока шло назначение
+            Order.objects.filter(id=taken_order.id).update(restaurant=self.near)
+            return get_restaurants_for_orders(order_ids)
+
+        with mock.patch('restaurateur.assignment.get_restaurants_for_orders', take_order):
+            self.assertEqual(assign_restaurants(), 1)
+
+        self.assertEqual(Order.objects.get(id=taken_order.id).restaurant, self.near)
+
+    def test_queries_depend_on_batches_only(self):
+        # Прогреваем индекс ресторанов и матрицу доступности
+        assign_restaurants()
+        for batch_size, batches_count in [(1, 2), (2, 1), (10, 1)]:
+            Order.objects.filter(status='unprocessed').update(restaurant=None)
+            # Загрузка ресторанов, по четыре запроса на пачку и пустая последняя пачка
+            with self.subTest(batch_size=batch_size), self.assertNumQueries(2 + 4 * batches_count):
+                self.assertEqual(assign_restaurants(batch_size=batch_size), 2)
+
+
+@override_settings(ORDERS_PAGE_SIZE=2)
+class TestOrdersBoard(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user('manager', is_staff=True)
+        for status, payment_method in [('unprocessed', 'cash'),
+                                       ('completed', 'cash'),
+                                       ('delivering', 'cash'),
+                                       ('unprocessed', 'cashless'),
+                                       ('unprocessed', 'cash')]:
+            Order.objects.create(firstname='Vasya',
+                                 lastname='Petrov',
+                                 phonenumber='+79311234567',
+                                 address='Дыбенко',
+                                 status=status,
+                                 payment_method=payment_method,
+                                 )
+
+    def setUp(self):
+        self.client.force_login(self.manager)
+
+    def get_pages(self, url):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            pages.append([order.id for order in response.context['orders']])
+            url = response.context['next_page_url'] and f'/manager/orders/{response.context["next_page_url"]}'
+        return pages
+
+    def test_keyset_pages_skip_completed_orders(self):
+        order_ids = list(
+            Order.objects.exclude(status='completed').order_by('id').values_list('id', flat=True)
+        )
+        self.assertEqual(self.get_pages('/manager/orders/'),
+                         [order_ids[:2], order_ids[2:]],
+                         )
+
+    def test_filters(self):
+        pages = self.get_pages('/manager/orders/?status=unprocessed&payment_method=cash')
+
+        orders = Order.objects.filter(id__in=pages[0])
+        self.assertEqual(len(pages), 1)
+        self.assertEqual({(order.status, order.payment_method) for order in orders},
+                         {('unprocessed', 'cash')},
+                         )
+
+    @override_settings(ORDERS_STREAM_DURATION=0, ORDERS_STREAM_LAG=0)
+    def test_stream_sends_changed_orders(self):
+        response = self.client.get('/manager/orders/')
+        stream_url = response.context['stream_query']
+        order = Order.objects.filter(status='unprocessed').first()
+        order.status = 'completed'
+        order.save()
+
+        response = self.client.get(f'/manager/orders/stream/?{stream_url}')
+        events = b''.join(response.streaming_content).decode()
+
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertIn(f'"id": {order.id}, "visible": false', events)
+
+
+class TestOrdersExport(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user('manager', is_staff=True)
+        cls.product = Product.objects.create(name='Бургер', price=369)
+
+    def create_orders(self, count):
+        for _ in range(count):
+            order = Order.objects.create(firstname='Vasya',
+                                         lastname='Petrov',
+                                         phonenumber='+79311234567',
+                                         address='Дыбенко',
+                                         payment_method='cash',
+                                         )
+            OrderProductItem.objects.create(order=order,
+                                            product=self.product,
+                                            product_price=self.product.price,
+                                            quantity=2,
+                                            )
+
+    def export(self):
+        response = self.client.get('/manager/orders/export/')
+        self.assertTrue(response.streaming)
+        with CaptureQueriesContext(connection) as queries:
+            content = b''.join(response.streaming_content)
+        return json.loads(content), len(queries)
+
+    def test_export_is_staff_only(self):
+        customer = User.objects.create_user('customer')
+        self.client.force_login(customer)
+
+        response = self.client.get('/manager/orders/export/')
+
+        self.assertEqual(response.status_code, 302)
+
+    def test_orders_are_streamed_with_items(self):
+        self.create_orders(2)
+        self.client.force_login(self.manager)
+
+        orders, _ = self.export()
+
+        self.assertEqual(len(orders), 2)
+        self.assertEqual(orders[0]['phonenumber'], '+79311234567')
+        self.assertEqual(orders[0]['items'],
+                         [{'product_id': self.product.id, 'product_price': '369.00', 'quantity': 2}],
+                         )
+
+    def test_queries_do_not_grow_with_orders(self):
+        self.client.force_login(self.manager)
+        self.create_orders(1)
+        _, few_orders_queries = self.export()
+
+        self.create_orders(20)
+        _, many_orders_queries = self.export()
+
+        self.assertEqual(few_orders_queries, many_orders_queries)
+
+    def test_invalid_phonenumber_is_exported_as_is(self):
+        self.create_orders(2)
+        # Номера, сохранённые в обход валидации, не должны ронять выгрузку
+        first_order, second_order = Order.objects.order_by('id')
+        Order.objects.filter(id=first_order.id).update(phonenumber='не помню')
+        Order.objects.filter(id=second_order.id).update(phonenumber='')
+        self.client.force_login(self.manager)
+
+        orders, _ = self.export()
+
+        self.assertEqual([order['phonenumber'] for order in orders], ['не помню', ''])
+
+
+class TestMetrics(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user('manager', is_staff=True)
+
+    def setUp(self):
+        registry.clear()
+
+    def test_manager_views_are_measured(self):
+        self.client.force_login(self.manager)
+        self.client.get('/manager/restaurants/')
+
+        response = self.client.get('/manager/metrics/')
+
+        self.assertEqual(response.status_code, 200)
+        metrics = response.content.decode()
+        self.assertIn('starburger_request_duration_seconds_count'
+                      '{method="GET",view="restaurateur:RestaurantView"} 1',
+                      metrics,
+                      )
+        self.assertIn('starburger_request_sql_queries_bucket'
+                      '{view="restaurateur:RestaurantView",le="+Inf"} 1',
+                      metrics,
+                      )
+
+    def test_unknown_method_is_counted_as_other(self):
+        self.client.generic('FOOBAR', '/manager/metrics/')
+
+        self.assertIn('starburger_request_duration_seconds_count'
+                      '{method="other",view="restaurateur:metrics"} 1',
+                      registry.render(),
+                      )
+
+    def test_metrics_are_staff_only(self):
+        response = self.client.get('/manager/metrics/')
+        self.assertEqual(response.status_code, 302)
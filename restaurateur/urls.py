@@ -14,6 +14,13 @@ urlpatterns = [
 
     # TODO заглушка для нереализованного функционала
     path('orders/', views.view_orders, name="view_orders"),
+    path('orders/export/', views.export_orders, name="export_orders"),
+    path('orders/stream/', views.stream_orders, name="stream_orders"),
+
+    path('analytics/', views.view_analytics, name="view_analytics"),
+    path('analytics/sales.json', views.analytics_api, name="analytics_api"),
+
+    path('metrics/', views.view_metrics, name="metrics"),
 
     path('login/', views.LoginView.as_view(), name="login"),
     path('logout/', views.LogoutView.as_view(), name="logout"),
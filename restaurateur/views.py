@@ -1,7 +1,15 @@
+import json
+import time
+from datetime import timedelta
+
 from django import forms
+from django.conf import settings
 from django.shortcuts import redirect, render
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
 from django.views import View
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
+from django.utils import timezone
 from django.contrib.auth.decorators import user_passes_test
 
 from django.contrib.auth import authenticate, login
@@ -9,9 +17,15 @@ from django.contrib.auth import views as auth_views
 
 from django.db.models import Sum, F, Q, Count
 
+from foodcartapp.analytics import get_sales_report
+from foodcartapp.availability import get_availability_matrix
+from foodcartapp.exports import iter_orders_export
 from foodcartapp.models import Product, Restaurant, Order, OrderProductItem, RestaurantMenuItem
-from foodcartapp.querysets import get_restaurants_with_order_products
-from restaurateur.geolocation import get_restaurants_distances
+from foodcartapp.querysets import get_restaurants_for_orders
+from foodcartapp.streaming import stream_json_response
+from restaurateur.keyset import decode_cursor, encode_cursor, filter_after
+from restaurateur.distances import rank_restaurants
+from restaurateur.metrics import registry
 
 
 class Login(forms.Form):
@@ -68,51 +82,267 @@ def is_manager(user):
 
 @user_passes_test(is_manager, login_url='restaurateur:login')
 def view_products(request):
-    restaurants = Restaurant.objects.prefetch_related('menu_items').order_by('name')
-    products = Product.objects.prefetch_related('menu_items')
-
-    default_availability = {restaurant.id: False for restaurant in restaurants}
-    products_with_restaurants = []
-    for product in products:
+    matrix = get_availability_matrix()
+    products = Product.objects.select_related('category')
 
-        availability = {
-            **default_availability,
-            **{item.restaurant_id: item.availability for item in product.menu_items.all()},
-        }
-        orderer_availability = [availability[restaurant.id] for restaurant in restaurants]
-
-        products_with_restaurants.append(
-            (product, orderer_availability)
-        )
+    products_with_restaurants = [
+        (product, matrix.get_row(product.id))
+        for product in products
+    ]
 
     return render(request, template_name="products_list.html", context={
         'products_with_restaurants': products_with_restaurants,
-        'restaurants': restaurants,
+        'restaurants': matrix.restaurants,
     })
 
 
 @user_passes_test(is_manager, login_url='restaurateur:login')
 def view_restaurants(request):
     return render(request, template_name="restaurants_list.html", context={
-        'restaurants': Restaurant.objects.prefetch_related('menu_items').order_by('name'),
+        'restaurants': Restaurant.objects.order_by('name'),
     })
 
 
+class OrdersFilter(forms.Form):
+    status = forms.ChoiceField(
+        label='Статус', required=False,
+        choices=[('', 'Все незавершённые'), *Order.STATUSES],
+        widget=forms.Select(attrs={'class': 'form-control'}),
+    )
+    payment_method = forms.ChoiceField(
+        label='Способ оплаты', required=False,
+        choices=[('', 'Любой'), *Order.PAYMENT_METHOD],
+        widget=forms.Select(attrs={'class': 'form-control'}),
+    )
+    restaurant = forms.ModelChoiceField(
+        label='Ресторан', required=False,
+        queryset=Restaurant.objects.order_by('name'),
+        empty_label='Любой',
+        widget=forms.Select(attrs={'class': 'form-control'}),
+    )
+
+
+ORDERS_BOARD_FIELDS = [
+    'id',
+    'created_at',
+    'status',
+    'payment_method',
+    'total',
+    'firstname',
+    'lastname',
+    'phonenumber',
+    'address',
+    'comment',
+    'latitude',
+    'longitude',
+    'geocoding_status',
+    'restaurant__name',
+]
+
+
+def filter_board_orders(orders, filters):
+    if filters.get('status'):
+        orders = orders.filter(status=filters['status'])
+    else:
+        orders = orders.exclude(status='completed')
+    if filters.get('payment_method'):
+        orders = orders.filter(payment_method=filters['payment_method'])
+    if filters.get('restaurant'):
+        orders = orders.filter(restaurant=filters['restaurant'])
+    return orders
+
+
+def is_on_board(order, filters):
+    if filters.get('status'):
+        if order.status != filters['status']:
+            return False
+    elif order.status == 'completed':
+        return False
+    if filters.get('payment_method') and order.payment_method != filters['payment_method']:
+        return False
+    if filters.get('restaurant') and order.restaurant_id != filters['restaurant'].id:
+        return False
+    return True
+
+
+def get_orders_distances(orders):
+    """
+    Rank eligible restaurants of orders, hiding ones out of delivery radius.
+
+    The whole page is ranked with one distance matrix, the radius only
+    filters its result.
+    """
+    restaurants_by_order = get_restaurants_for_orders(
+        order.id for order in orders
+        )
+    return rank_restaurants(
+        orders,
+        restaurants_by_order,
+        radius_km=settings.DELIVERY_RADIUS_KM,
+        )
+
+
 @user_passes_test(is_manager, login_url='restaurateur:login')
 def view_orders(request):
+    filter_form = OrdersFilter(request.GET)
+    filters = filter_form.cleaned_data if filter_form.is_valid() else {}
 
-    orders = Order.objects.exclude(status='completed')
-    
-    distances = {}
-    for order in orders:
-        restaurants_with_all_order_products = get_restaurants_with_order_products(order.id)
+    orders = (
+        Order.objects
+        .select_related('restaurant')
+        .only(*ORDERS_BOARD_FIELDS)
+        .order_by('created_at', 'id')
+        )
+    orders = filter_board_orders(orders, filters)
+
+    cursor = decode_cursor(request.GET.get('after'))
+    if cursor:
+        orders = filter_after(orders, 'created_at', cursor)
+
+    # Stream changes made since a moment a bit before rendering, rows
+    # updated twice are just patched twice
+    stream_started_at = timezone.now() - timedelta(seconds=settings.ORDERS_STREAM_LAG)
+    orders = list(orders[:settings.ORDERS_PAGE_SIZE + 1])
+    next_page_url = None
+    if len(orders) > settings.ORDERS_PAGE_SIZE:
+        orders = orders[:settings.ORDERS_PAGE_SIZE]
+        query = request.GET.copy()
+        query['after'] = encode_cursor(orders[-1].created_at, orders[-1].id)
+        next_page_url = f'?{query.urlencode()}'
+
+    stream_query = request.GET.copy()
+    stream_query['after'] = encode_cursor(stream_started_at, 0)
 
-        distances[order.id] = get_restaurants_distances(
-            restaurants_with_all_order_products, 
-            order
-            )
-   
     return render(request, template_name='order_items.html', context={
         'orders': orders,
-        'distances': distances,
+        'distances': get_orders_distances(orders),
+        'delivery_radius_km': settings.DELIVERY_RADIUS_KM,
+        'filter_form': filter_form,
+        'next_page_url': next_page_url,
+        'stream_query': stream_query.urlencode(),
+        'board_url': request.get_full_path(),
+    })
+
+
+def iter_order_events(cursor, filters, board_url):
+    """
+    Yield server-sent events with rows of orders changed after the cursor.
+
+    The database is polled every ORDERS_STREAM_POLL_INTERVAL seconds.
+    Orders updated during the last ORDERS_STREAM_LAG seconds are held back,
+    so that transactions committed a bit later than their updated_at
+    are not skipped. The stream ends after ORDERS_STREAM_DURATION seconds
+    not to hold a server worker forever, the browser then reconnects
+    passing the last event ID as the cursor.
+    """
+    yield 'retry: 1000\n\n'
+    deadline = time.monotonic() + settings.ORDERS_STREAM_DURATION
+    while True:
+        orders = (
+            Order.objects
+            .select_related('restaurant')
+            .only(*ORDERS_BOARD_FIELDS, 'updated_at')
+            .filter(updated_at__lte=timezone.now() - timedelta(seconds=settings.ORDERS_STREAM_LAG))
+            .order_by('updated_at', 'id')
+            )
+        orders = list(filter_after(orders, 'updated_at', cursor)[:settings.ORDERS_PAGE_SIZE])
+
+        distances = get_orders_distances(orders)
+        for order in orders:
+            cursor = (order.updated_at, order.id)
+            data = json.dumps({
+                'id': order.id,
+                'visible': is_on_board(order, filters),
+                'html': render_to_string('order_row.html', {
+                    'order': order,
+                    'distances': distances,
+                    'delivery_radius_km': settings.DELIVERY_RADIUS_KM,
+                    'board_url': board_url,
+                }),
+            })
+            yield f'id: {encode_cursor(*cursor)}\nevent: order\ndata: {data}\n\n'
+
+        if time.monotonic() >= deadline:
+            return
+        if not orders:
+            yield ': keep-alive\n\n'
+            time.sleep(settings.ORDERS_STREAM_POLL_INTERVAL)
+
+
+@user_passes_test(is_manager, login_url='restaurateur:login')
+def stream_orders(request):
+    filter_form = OrdersFilter(request.GET)
+    filters = filter_form.cleaned_data if filter_form.is_valid() else {}
+
+    cursor = (
+        decode_cursor(request.headers.get('Last-Event-ID'))
+        or decode_cursor(request.GET.get('after'))
+        or (timezone.now(), 0)
+        )
+    board_url = reverse('restaurateur:view_orders')
+    response = StreamingHttpResponse(
+        iter_order_events(cursor, filters, board_url),
+        content_type='text/event-stream',
+        )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@user_passes_test(is_manager, login_url='restaurateur:login')
+def export_orders(request):
+    orders = iter_orders_export(settings.STREAMING_CHUNK_SIZE)
+    return stream_json_response(
+        orders,
+        lambda order: order,
+        headers={'Content-Disposition': 'attachment; filename="orders.json"'},
+        )
+
+
+class SalesFilter(forms.Form):
+    date_from = forms.DateField(
+        label='С', required=False,
+        widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
+    )
+    date_to = forms.DateField(
+        label='По', required=False,
+        widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
+    )
+    restaurant = forms.ModelChoiceField(
+        label='Ресторан', required=False,
+        queryset=Restaurant.objects.order_by('name'),
+        empty_label='Все',
+        widget=forms.Select(attrs={'class': 'form-control'}),
+    )
+
+
+def get_requested_sales_report(request):
+    filter_form = SalesFilter(request.GET)
+    filters = filter_form.cleaned_data if filter_form.is_valid() else {}
+    date_to = filters.get('date_to') or timezone.localdate()
+    date_from = filters.get('date_from') or date_to - timedelta(days=30)
+    report = get_sales_report(date_from, date_to, filters.get('restaurant'))
+    return filter_form, report
+
+
+@user_passes_test(is_manager, login_url='restaurateur:login')
+def view_analytics(request):
+    filter_form, report = get_requested_sales_report(request)
+    return render(request, template_name='analytics.html', context={
+        'filter_form': filter_form,
+        'report': report,
+        'api_query': request.GET.urlencode(),
     })
+
+
+@user_passes_test(is_manager, login_url='restaurateur:login')
+def analytics_api(request):
+    _, report = get_requested_sales_report(request)
+    return JsonResponse(report, json_dumps_params={'ensure_ascii': False})
+
+
+@user_passes_test(is_manager, login_url='restaurateur:login')
+def view_metrics(request):
+    return HttpResponse(registry.render(),
+                        content_type='text/plain; version=0.0.4; charset=utf-8',
+                        )
@@ -30,10 +30,12 @@ INSTALLED_APPS = [
     'phonenumber_field',
     'phonenumbers',
     'rest_framework',
+    'rest_framework.authtoken',
     'geopy',
 ]
 
 MIDDLEWARE = [
+    'restaurateur.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -81,6 +83,43 @@ TEMPLATES = [
     },
 ]
 
+CACHES = {
+    'default': env.dj_cache_url('CACHE_URL', 'locmem://'),
+}
+# Seconds the product catalog may stay cached, bounds staleness when
+# the cache is not shared between processes
+CATALOG_CACHE_TTL = env.int('CATALOG_CACHE_TTL', 60)
+
+# Max number of orders accepted by /api/orders/batch/
+ORDERS_BATCH_MAX_SIZE = env.int('ORDERS_BATCH_MAX_SIZE', 1000)
+
+REST_FRAMEWORK = {
+    # Batches a partner may send, e.g. 60/min or 1000/day
+    'DEFAULT_THROTTLE_RATES': {
+        'orders_batch': env.str('ORDERS_BATCH_THROTTLE_RATE', '60/min'),
+    },
+}
+
+# Seconds a stored response is replayed for a repeated Idempotency-Key
+IDEMPOTENCY_KEY_TTL = env.int('IDEMPOTENCY_KEY_TTL', 24 * 60 * 60)
+
+# Orders shown per page of the manager orders board
+ORDERS_PAGE_SIZE = env.int('ORDERS_PAGE_SIZE', 50)
+
+# Live updates of the orders board, in seconds: how long one event stream
+# holds a server worker, how often it polls the database and how long
+# fresh changes are held back waiting for their transactions to commit
+ORDERS_STREAM_DURATION = env.int('ORDERS_STREAM_DURATION', 55)
+ORDERS_STREAM_POLL_INTERVAL = env.float('ORDERS_STREAM_POLL_INTERVAL', 2)
+ORDERS_STREAM_LAG = env.float('ORDERS_STREAM_LAG', 1)
+
+# Completed orders older than this are moved to the archive tables
+# by the archive_orders command
+ORDER_ARCHIVE_HORIZON_DAYS = env.int('ORDER_ARCHIVE_HORIZON_DAYS', 90)
+
+# Rows fetched per query by streaming JSON responses
+STREAMING_CHUNK_SIZE = env.int('STREAMING_CHUNK_SIZE', 2000)
+
 WSGI_APPLICATION = 'star_burger.wsgi.application'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
@@ -129,6 +168,34 @@ PHONENUMBER_DEFAULT_REGION = 'RU'
 PHONENUMBER_DB_FORMAT = 'NATIONAL'
 YANDEX_MAPS_API_KEY = env.str("YANDEX_MAPS_API_KEY")
 
+# Geocoder HTTP client settings, rate limit in requests per second, 0 to disable
+GEOCODER_TIMEOUT = env.float('GEOCODER_TIMEOUT', 10)
+GEOCODER_MAX_WORKERS = env.int('GEOCODER_MAX_WORKERS', 8)
+GEOCODER_RATE_LIMIT = env.float('GEOCODER_RATE_LIMIT', 10)
+
+# Geocoder cache settings, TTL in seconds
+GEOCODE_CACHE_TTL = env.int('GEOCODE_CACHE_TTL', 30 * 24 * 60 * 60)
+GEOCODE_NEGATIVE_CACHE_TTL = env.int('GEOCODE_NEGATIVE_CACHE_TTL', 24 * 60 * 60)
+GEOCODE_LRU_SIZE = env.int('GEOCODE_LRU_SIZE', 1024)
+
+# Restaurant spatial index: cell size in degrees, rebuild period in seconds
+# and search radius of the manager orders page in km
+RESTAURANT_INDEX_CELL_SIZE = env.float('RESTAURANT_INDEX_CELL_SIZE', 0.05)
+RESTAURANT_INDEX_TTL = env.int('RESTAURANT_INDEX_TTL', 60)
+DELIVERY_RADIUS_KM = env.float('DELIVERY_RADIUS_KM', 50)
+
+# Automatic restaurant assignment: each order a restaurant is delivering
+# costs as much as this many extra km of distance
+ASSIGNMENT_LOAD_PENALTY_KM = env.float('ASSIGNMENT_LOAD_PENALTY_KM', 2)
+ASSIGNMENT_BATCH_SIZE = env.int('ASSIGNMENT_BATCH_SIZE', 1000)
+
+# Background geocoding worker settings, delays in seconds
+GEOCODING_BATCH_SIZE = env.int('GEOCODING_BATCH_SIZE', 50)
+GEOCODING_MAX_ATTEMPTS = env.int('GEOCODING_MAX_ATTEMPTS', 5)
+GEOCODING_RETRY_DELAY = env.int('GEOCODING_RETRY_DELAY', 60)
+GEOCODING_POLL_INTERVAL = env.float('GEOCODING_POLL_INTERVAL', 5)
+GEOCODING_CLAIM_TIMEOUT = env.int('GEOCODING_CLAIM_TIMEOUT', 300)
+
 # Rollbar settings
 rollbar_token = env.str("ROLLBAR_TOKEN")
 ROLLBAR = {